@@ -0,0 +1,204 @@
+# Benchmark del torneo: genera torneos sintéticos con el esquema de torneo_parejas.json, mide las operaciones
+# principales y el render de cada página con AppTest, y guarda los tiempos en JSON para comparar versiones.
+#   python benchmark_torneo.py
+#   python benchmark_torneo.py --parejas 10 100 2000 --completados 0 0.5 1 --salida resultados.json
+#   PADEL_STORAGE=sqlite python benchmark_torneo.py --sin-paginas
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+PAGINAS = {"Dashboard": "show_dashboard", "Partidos": "show_partidos_management",
+           "Clasificación": "show_clasificacion"}
+
+
+def generar_torneo(num_parejas, completados, jornadas=10, semilla=0):
+    # Torneo de liga con las primeras jornadas del calendario generadas y una fracción de partidos jugados
+    import torneo_core
+
+    aleatorio = random.Random(semilla)
+    parejas = [{"id": i, "jugadores": [f"Jugador {2 * i - 1}", f"Jugador {2 * i}"], "victorias": 0, "derrotas": 0}
+               for i in range(1, num_parejas + 1)]
+    ids = [pareja["id"] for pareja in parejas]
+    orden = ids + [None] if len(ids) % 2 else ids
+    jornadas = min(jornadas, len(orden) - 1)
+    partidos = []
+    for ronda in range(jornadas):
+        for pareja1_id, pareja2_id in torneo_core.round_robin_round(orden, ronda):
+            if pareja1_id is None or pareja2_id is None:
+                continue
+            partidos.append({"id": len(partidos) + 1, "pareja1_id": pareja1_id, "pareja2_id": pareja2_id,
+                             "ganador_id": None, "fecha": datetime(2024, 1, 1 + ronda % 28).isoformat(),
+                             "jornada": ronda + 1})
+    for partido in aleatorio.sample(partidos, round(len(partidos) * completados)):
+        ganador_id, perdedor_id = aleatorio.sample([partido["pareja1_id"], partido["pareja2_id"]], 2)
+        partido["ganador_id"] = ganador_id
+        parejas[ganador_id - 1]["victorias"] += 1
+        parejas[perdedor_id - 1]["derrotas"] += 1
+    return {"parejas": parejas, "partidos": partidos, "version": 1,
+            "calendario": {"orden": orden, "ronda": jornadas, "jornada": jornadas}}
+
+
+def cronometrar(funcion, repeticiones, preparar=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def _pagina_autenticada(ruta_app):
+    # Script de AppTest: la app con una sesión de administrador ya iniciada. El componente de cookies necesita
+    # un navegador, así que se sustituye por un diccionario antes de ejecutar la app.
+    import runpy
+    import sys
+    import types
+
+    class CookiesAdministrador(dict):
+        def __init__(self, **kwargs):
+            super().__init__(authenticated="true", username="admin")
+
+        def ready(self):
+            return True
+
+        def save(self):
+            pass
+
+    cookies = types.ModuleType("streamlit_cookies_manager")
+    cookies.EncryptedCookieManager = CookiesAdministrador
+    sys.modules["streamlit_cookies_manager"] = cookies
+    runpy.run_path(ruta_app, run_name="__main__")
+
+
+def medir_paginas(repeticiones):
+    from streamlit.testing.v1 import AppTest
+
+    resultados = {}
+    for pagina, funcion in PAGINAS.items():
+        prueba = AppTest.from_function(_pagina_autenticada, args=(os.path.join(DIRECTORIO_APP, "torneo_padel.py"),),
+                                       default_timeout=600)
+        prueba.session_state.page = pagina
+        primera = cronometrar(prueba.run, 1)
+        if prueba.exception:
+            raise RuntimeError(f"La página {pagina} falló: {prueba.exception[0].value}")
+        resultados[f"{funcion} (primera)"] = primera
+        resultados[funcion] = cronometrar(prueba.run, repeticiones)
+    return resultados
+
+
+def medir_operaciones(repeticiones):
+    import torneo_core
+
+    def store_nuevo():
+        torneo_core._store = None
+
+    def cargar_sin_cache():
+        store_nuevo()
+        torneo_core.initialize_tournament()
+
+    resultados = {
+        "initialize_tournament (frío)": cronometrar(torneo_core.initialize_tournament, repeticiones, store_nuevo),
+        "initialize_tournament": cronometrar(torneo_core.initialize_tournament, repeticiones),
+        "get_clasificacion (frío)": cronometrar(torneo_core.get_clasificacion, repeticiones, cargar_sin_cache),
+        "get_clasificacion": cronometrar(torneo_core.get_clasificacion, repeticiones),
+    }
+    contador = iter(range(10 ** 9))
+    resultados["add_pareja"] = cronometrar(
+        lambda: torneo_core.add_pareja(f"Nuevo {next(contador)}", f"Nuevo {next(contador)}"), repeticiones)
+    resultados["generate_jornada"] = cronometrar(torneo_core.generate_jornada, repeticiones)
+    pendientes = iter(list(torneo_core.get_tournament_model().partidos_pendientes))
+
+    def guardar_resultado():
+        partido = next(pendientes, None)
+        if partido is not None:
+            torneo_core.update_resultado(partido["id"], partido["pareja1_id"])
+
+    resultados["update_resultado"] = cronometrar(guardar_resultado, repeticiones)
+    # Tras las mutaciones la clasificación vuelve a estar en caché: se mide la lectura que hace cada página
+    resultados["get_clasificacion (tras mutar)"] = cronometrar(torneo_core.get_clasificacion, repeticiones)
+    resultados["get_tournament_summary (tras mutar)"] = cronometrar(torneo_core.get_tournament_summary, repeticiones)
+    return resultados
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORIO_APP, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del torneo de pádel con torneos sintéticos")
+    parser.add_argument("--parejas", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--completados", type=float, nargs="+", default=[0.5],
+                        help="fracción de partidos con resultado (0-1)")
+    parser.add_argument("--jornadas", type=int, default=10, help="jornadas ya generadas en cada torneo")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--sin-paginas", action="store_true", help="no medir el render de las páginas")
+    parser.add_argument("--salida", default="benchmark_resultados.json")
+    args = parser.parse_args(argv)
+    salida = os.path.abspath(args.salida)
+    sys.path.insert(0, DIRECTORIO_APP)
+    import torneo_core
+
+    informe = {
+        "fecha": datetime.now().isoformat(),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "almacenamiento": torneo_core.STORAGE_MODE,
+        "repeticiones": args.repeticiones,
+        "resultados": []
+    }
+    directorio_inicial = os.getcwd()
+    for num_parejas in args.parejas:
+        for completados in args.completados:
+            directorio = tempfile.mkdtemp(prefix="benchmark_torneo_")
+            try:
+                os.chdir(directorio)
+                torneo = generar_torneo(num_parejas, completados, args.jornadas)
+                with open(torneo_core.TORNEO_FILE, "w", encoding="utf-8") as f:
+                    json.dump(torneo, f, ensure_ascii=False, indent=2)
+                torneo_core._store = None
+                tiempos = {}
+                if not args.sin_paginas:
+                    tiempos.update(medir_paginas(args.repeticiones))
+                tiempos.update(medir_operaciones(args.repeticiones))
+            finally:
+                torneo_core._store = None
+                os.chdir(directorio_inicial)
+                shutil.rmtree(directorio, ignore_errors=True)
+            for operacion, muestras in tiempos.items():
+                fila = {
+                    "parejas": num_parejas,
+                    "completados": completados,
+                    "partidos": len(torneo["partidos"]),
+                    "operacion": operacion,
+                    "muestras": len(muestras),
+                    "min_ms": round(min(muestras), 3),
+                    "mediana_ms": round(statistics.median(muestras), 3),
+                    "max_ms": round(max(muestras), 3)
+                }
+                informe["resultados"].append(fila)
+                print(f"{num_parejas:>5} parejas · {completados:.0%} jugados · {operacion:<40} "
+                      f"mediana {fila['mediana_ms']:>9.2f} ms")
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# Prueba de carga: N sesiones simultáneas contra el mismo torneo. Los lectores consultan la clasificación y los
+# partidos pendientes como un móvil refrescando la página; los escritores guardan resultados. Cada escritor tiene
+# sus propios partidos y al final se comprueba que el ganador de cada uno y las victorias/derrotas de cada pareja
+# son exactamente los que dicen las operaciones confirmadas: cualquier diferencia es una actualización perdida.
+#   python loadtest_torneo.py
+#   python loadtest_torneo.py --lectores 40 --escritores 3 --parejas 200 --modo procesos
+#   PADEL_STORAGE=sqlite python loadtest_torneo.py --modo hilos --salida carga.json
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+
+
+def _importar_core(directorio):
+    os.chdir(directorio)
+    if DIRECTORIO_APP not in sys.path:
+        sys.path.insert(0, DIRECTORIO_APP)
+    import torneo_core
+    return torneo_core
+
+
+def lector(directorio, parar, semilla):
+    torneo_core = _importar_core(directorio)
+    aleatorio = random.Random(semilla)
+    latencias = []
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        clasificacion = torneo_core.get_clasificacion()
+        modelo = torneo_core.get_tournament_model()
+        modelo.partidos_pendientes[:20]
+        if clasificacion:
+            modelo.partidos_de(aleatorio.choice(clasificacion)["id"])
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        # Tiempo de "lectura" del usuario entre refrescos
+        time.sleep(aleatorio.uniform(0, 0.01))
+    return {"latencias": latencias}
+
+
+def escritor(directorio, planes, semilla, lote):
+    # planes: [(partido_id, [ganador, ...])]; cada partido se guarda varias veces y vale la última escritura
+    # confirmada. Las escrituras rechazadas se cuentan como fallidas, no como perdidas: el usuario lo ve.
+    torneo_core = _importar_core(directorio)
+    aleatorio = random.Random(semilla)
+    latencias = []
+    fallos = []
+    confirmados = {}
+    escrituras = [(partido_id, ganador_id) for partido_id, ganadores in planes for ganador_id in ganadores]
+    i = 0
+    while i < len(escrituras):
+        inicio = time.perf_counter()
+        if lote > 1 and aleatorio.random() < 0.2:
+            # Lote con partidos distintos: dos escrituras del mismo partido se separan para respetar el orden
+            bloque = []
+            vistos = set()
+            while i < len(escrituras) and len(bloque) < lote and escrituras[i][0] not in vistos:
+                bloque.append(escrituras[i])
+                vistos.add(escrituras[i][0])
+                i += 1
+            success, message = torneo_core.update_resultados(bloque)
+        else:
+            bloque = [escrituras[i]]
+            i += 1
+            success, message = torneo_core.update_resultado(*bloque[0])
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if success:
+            confirmados.update(bloque)
+        else:
+            fallos.append((bloque, message))
+    return {"latencias": latencias, "fallos": len(fallos), "errores": [message for _, message in fallos[:5]],
+            "confirmados": confirmados}
+
+
+def _resumen(latencias, segundos):
+    import torneo_core
+
+    ordenadas = sorted(latencias)
+    return {
+        "operaciones": len(ordenadas),
+        "por_segundo": round(len(ordenadas) / segundos, 1) if segundos else None,
+        "p50_ms": round(torneo_core.percentile(ordenadas, 50) or 0, 2),
+        "p95_ms": round(torneo_core.percentile(ordenadas, 95) or 0, 2),
+        "p99_ms": round(torneo_core.percentile(ordenadas, 99) or 0, 2),
+        "max_ms": round(ordenadas[-1], 2) if ordenadas else 0
+    }
+
+
+def verificar(torneo_core, torneo_inicial, confirmados):
+    # Compara el estado final con el que resulta de aplicar la última escritura confirmada de cada partido
+    esperado = {p["id"]: p["ganador_id"] for p in torneo_inicial["partidos"]}
+    esperado.update(confirmados)
+    torneo_core._store = None
+    modelo = torneo_core.get_tournament_model()
+    perdidas = [partido_id for partido_id, ganador_id in esperado.items()
+                if modelo.partido(partido_id) is None or modelo.partido(partido_id)["ganador_id"] != ganador_id]
+    contadores = {p["id"]: [0, 0] for p in torneo_inicial["parejas"]}
+    for partido in torneo_inicial["partidos"]:
+        ganador_id = esperado[partido["id"]]
+        if ganador_id:
+            perdedor_id = partido["pareja2_id"] if ganador_id == partido["pareja1_id"] else partido["pareja1_id"]
+            contadores[ganador_id][0] += 1
+            contadores[perdedor_id][1] += 1
+    contadores_erroneos = [pareja["id"] for pareja in modelo.parejas
+                           if [pareja["victorias"], pareja["derrotas"]] != contadores[pareja["id"]]]
+    return {"actualizaciones_perdidas": len(perdidas), "partidos_perdidos": perdidas[:20],
+            "contadores_erroneos": len(contadores_erroneos), "parejas_erroneas": contadores_erroneos[:20],
+            "version_final": modelo.version}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones simultáneas de lectura y escritura")
+    parser.add_argument("--lectores", type=int, default=20)
+    parser.add_argument("--escritores", type=int, default=3)
+    parser.add_argument("--parejas", type=int, default=100)
+    parser.add_argument("--escrituras", type=int, default=3,
+                        help="veces que cada escritor guarda cada uno de sus partidos (vale la última)")
+    parser.add_argument("--partidos-por-escritor", type=int, default=20)
+    parser.add_argument("--lote", type=int, default=3, help="tamaño máximo de los lotes de update_resultados")
+    parser.add_argument("--modo", choices=["procesos", "hilos"], default="procesos")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="fichero JSON con el informe")
+    args = parser.parse_args(argv)
+    sys.path.insert(0, DIRECTORIO_APP)
+    from benchmark_torneo import generar_torneo
+    import torneo_core
+
+    aleatorio = random.Random(args.semilla)
+    directorio = tempfile.mkdtemp(prefix="carga_torneo_")
+    directorio_inicial = os.getcwd()
+    try:
+        os.chdir(directorio)
+        torneo = generar_torneo(args.parejas, 0.3, jornadas=10, semilla=args.semilla)
+        with open(torneo_core.TORNEO_FILE, "w", encoding="utf-8") as f:
+            json.dump(torneo, f, ensure_ascii=False)
+        torneo_core._store = None
+        torneo_core.initialize_tournament()
+        # Partidos disjuntos por escritor, cada uno con varias escrituras (la última puede borrar el resultado)
+        partidos = aleatorio.sample(torneo["partidos"],
+                                    min(len(torneo["partidos"]), args.escritores * args.partidos_por_escritor))
+        planes = [[] for _ in range(args.escritores)]
+        for i, partido in enumerate(partidos):
+            opciones = [partido["pareja1_id"], partido["pareja2_id"], None]
+            planes[i % args.escritores].append(
+                (partido["id"], [aleatorio.choice(opciones[:2]) for _ in range(args.escrituras - 1)]
+                 + [aleatorio.choice(opciones)]))
+        sesiones = args.lectores + args.escritores
+        if args.modo == "procesos":
+            # Procesos nuevos (spawn): cada uno importa torneo_core y tiene su propio almacenamiento en memoria
+            contexto = multiprocessing.get_context("spawn")
+            gestor = contexto.Manager()
+            parar = gestor.Event()
+            ejecutor = concurrent.futures.ProcessPoolExecutor(sesiones, mp_context=contexto)
+        else:
+            gestor = None
+            parar = threading.Event()
+            ejecutor = concurrent.futures.ThreadPoolExecutor(sesiones)
+        with ejecutor:
+            inicio = time.perf_counter()
+            lectores = [ejecutor.submit(lector, directorio, parar, args.semilla + i) for i in range(args.lectores)]
+            escritores = [ejecutor.submit(escritor, directorio, plan, args.semilla + 1000 + i, args.lote)
+                          for i, plan in enumerate(planes)]
+            resultados_escritura = [futuro.result() for futuro in escritores]
+            segundos = time.perf_counter() - inicio
+            parar.set()
+            resultados_lectura = [futuro.result() for futuro in lectores]
+        if gestor is not None:
+            gestor.shutdown()
+        confirmados = {}
+        for resultado in resultados_escritura:
+            confirmados.update(resultado["confirmados"])
+        informe = {
+            "almacenamiento": torneo_core.STORAGE_MODE,
+            "modo": args.modo,
+            "lectores": args.lectores,
+            "escritores": args.escritores,
+            "parejas": args.parejas,
+            "segundos": round(segundos, 3),
+            "lecturas": _resumen([ms for r in resultados_lectura for ms in r["latencias"]], segundos),
+            "escrituras": dict(_resumen([ms for r in resultados_escritura for ms in r["latencias"]], segundos),
+                               fallidas=sum(r["fallos"] for r in resultados_escritura),
+                               errores=[e for r in resultados_escritura for e in r["errores"]][:5]),
+        }
+        informe.update(verificar(torneo_core, torneo, confirmados))
+    finally:
+        torneo_core._store = None
+        os.chdir(directorio_inicial)
+        shutil.rmtree(directorio, ignore_errors=True)
+    print(json.dumps(informe, ensure_ascii=False, indent=2))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+    correcto = not informe["actualizaciones_perdidas"] and not informe["contadores_erroneos"]
+    return 0 if correcto else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# Marcador público de solo lectura para espectadores, sin login ni sesión de Streamlit. Sirve la clasificación,
+# los partidos pendientes y los últimos resultados como JSON (/marcador.json) y como página HTML (/).
+# Las respuestas se generan una vez por snapshot del torneo y se sirven desde memoria con ETag: un cliente que
+# sondea con If-None-Match recibe un 304 sin cuerpo mientras el torneo no cambie.
+#   python marcador_publico.py --puerto 8502
+import argparse
+import hashlib
+import html
+import json
+import sys
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torneo_core
+
+PENDIENTES_VISIBLES = 30
+RESULTADOS_VISIBLES = 20
+
+
+def _nombre(modelo, pareja_id):
+    pareja = modelo.pareja(pareja_id)
+    return " & ".join(pareja["jugadores"]) if pareja else "—"
+
+
+def build_marcador(modelo):
+    clasificacion = []
+    for posicion, pareja in enumerate(modelo.clasificacion.filas(modelo.pareja_por_id), 1):
+        jugados = pareja["victorias"] + pareja["derrotas"]
+        clasificacion.append({
+            "posicion": posicion,
+            "id": pareja["id"],
+            "pareja": " & ".join(pareja["jugadores"]),
+            "jugados": jugados,
+            "victorias": pareja["victorias"],
+            "derrotas": pareja["derrotas"],
+            "porcentaje": round(pareja["victorias"] / jugados * 100, 1) if jugados else 0.0
+        })
+
+    def partido(p):
+        datos = {"id": p["id"], "pareja1": _nombre(modelo, p["pareja1_id"]),
+                 "pareja2": _nombre(modelo, p["pareja2_id"])}
+        for campo in ("jornada", "grupo", "pista", "horario"):
+            if p.get(campo):
+                datos[campo] = p[campo]
+        if p["ganador_id"]:
+            datos["ganador"] = _nombre(modelo, p["ganador_id"])
+        return datos
+
+    return {
+        "version": modelo.version,
+        "generado": datetime.now().isoformat(timespec="seconds"),
+        "clasificacion": clasificacion,
+        "pendientes": [partido(p) for p in modelo.partidos_pendientes[:PENDIENTES_VISIBLES]],
+        "recientes": [partido(p) for p in reversed(modelo.partidos_completados[-RESULTADOS_VISIBLES:])]
+    }
+
+
+def render_html(marcador):
+    e = html.escape
+    filas = "".join(
+        f"<tr><td>{f['posicion']}</td><td>{e(f['pareja'])}</td><td>{f['jugados']}</td><td>{f['victorias']}</td>"
+        f"<td>{f['derrotas']}</td><td>{f['porcentaje']:.1f}%</td></tr>"
+        for f in marcador["clasificacion"])
+
+    def lista(partidos, resultado):
+        if not partidos:
+            return "<p>—</p>"
+        elementos = []
+        for p in partidos:
+            detalle = " · ".join(str(x) for x in (
+                f"Jornada {p['jornada']}" if "jornada" in p else None,
+                f"Grupo {p['grupo']}" if "grupo" in p else None,
+                f"Pista {p['pista']} {p.get('horario', '')}" if "pista" in p and not resultado else None) if x)
+            ganador = f" → 🏆 {e(p['ganador'])}" if resultado else ""
+            elementos.append(f"<li>{e(p['pareja1'])} vs {e(p['pareja2'])}{ganador}"
+                             f"{f' <small>({e(detalle)})</small>' if detalle else ''}</li>")
+        return f"<ul>{''.join(elementos)}</ul>"
+
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<meta http-equiv="refresh" content="30"><title>🎾 Pádel · Clasificación</title>
+<style>
+body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f8fafc; color: #222; margin: 1rem; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ padding: 0.4rem; border-bottom: 1px solid #e2e8f0; text-align: left; }}
+th {{ background: #1e3a8a; color: white; }}
+</style></head><body>
+<h1>🎾 Clasificación</h1>
+<table><thead><tr><th>Pos</th><th>Pareja</th><th>PJ</th><th>V</th><th>D</th><th>% Victoria</th></tr></thead>
+<tbody>{filas}</tbody></table>
+<h2>⏳ Próximos partidos</h2>{lista(marcador["pendientes"], False)}
+<h2>✅ Últimos resultados</h2>{lista(marcador["recientes"], True)}
+<p><small>Actualizado: {e(marcador["generado"])} · versión {marcador["version"]}</small></p>
+</body></html>"""
+
+
+class Scoreboard:
+    # Respuestas ya serializadas del último snapshot; se regeneran solo cuando el almacenamiento publica otro
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos = None
+        self._respuestas = {}
+
+    def get(self, tipo):
+        modelo = torneo_core.get_tournament_model()
+        with self._lock:
+            if modelo.datos is not self._datos:
+                marcador = build_marcador(modelo)
+                self._respuestas = {}
+                for clave, cuerpo, contenido in (
+                        ("json", json.dumps(marcador, ensure_ascii=False).encode("utf-8"),
+                         "application/json; charset=utf-8"),
+                        ("html", render_html(marcador).encode("utf-8"), "text/html; charset=utf-8")):
+                    etag = f'"{hashlib.sha1(cuerpo).hexdigest()[:20]}"'
+                    self._respuestas[clave] = (cuerpo, contenido, etag)
+                self._datos = modelo.datos
+            return self._respuestas[tipo]
+
+
+class ScoreboardHandler(BaseHTTPRequestHandler):
+    marcador = Scoreboard()
+    rutas = {"/": "html", "/index.html": "html", "/marcador.json": "json"}
+
+    def do_GET(self):
+        self._responder(enviar_cuerpo=True)
+
+    def do_HEAD(self):
+        self._responder(enviar_cuerpo=False)
+
+    def _responder(self, enviar_cuerpo):
+        tipo = self.rutas.get(self.path.split("?", 1)[0])
+        if tipo is None:
+            self.send_error(404, "No encontrado")
+            return
+        cuerpo, contenido, etag = self.marcador.get(tipo)
+        etiquetas = [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+        if etag in etiquetas or "*" in etiquetas:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", contenido)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if enviar_cuerpo:
+            self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Marcador público de solo lectura del torneo")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--puerto", type=int, default=8502)
+    args = parser.parse_args(argv)
+    servidor = ThreadingHTTPServer((args.host, args.puerto), ScoreboardHandler)
+    print(f"Marcador en http://{args.host}:{args.puerto}/ (JSON en /marcador.json)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
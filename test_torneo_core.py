@@ -0,0 +1,165 @@
+# Pruebas de la lógica del torneo (sin Streamlit): python -m pytest -q
+import random
+
+import pytest
+
+import torneo_core
+from benchmark_torneo import generar_torneo
+
+
+@pytest.fixture
+def torneo_vacio(tmp_path, monkeypatch):
+    # Almacenamiento JSON nuevo en un directorio temporal para cada prueba
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(torneo_core, "STORAGE_MODE", "json")
+    monkeypatch.setattr(torneo_core, "DURABILITY", "sync")
+    monkeypatch.setattr(torneo_core, "_store", None)
+    yield torneo_core
+    torneo_core._store = None
+
+
+@pytest.mark.parametrize("semilla", range(10))
+def test_standings_derive_igual_que_recalculo(semilla):
+    # Cada lote de operaciones aplicado con derive() debe dejar la misma tabla que calcularla desde cero
+    aleatorio = random.Random(semilla)
+    torneo = generar_torneo(12, 0.3, jornadas=4, semilla=semilla)
+    clasificacion = torneo_core.Standings.from_tournament(torneo["parejas"], torneo["partidos"])
+    for _ in range(150):
+        operaciones = []
+        for _ in range(aleatorio.randint(1, 4)):
+            ids = [p["id"] for p in torneo["parejas"]]
+            x = aleatorio.random()
+            if x < 0.1:
+                nueva = max(ids) + 1
+                operaciones.append({"op": "add_pareja", "pareja": {"id": nueva, "jugadores": [f"N{nueva}", f"M{nueva}"],
+                                                                   "victorias": 0, "derrotas": 0}})
+            elif x < 0.3:
+                pareja1_id, pareja2_id = aleatorio.sample(ids, 2)
+                siguiente = max((p["id"] for p in torneo["partidos"]), default=0) + 1
+                operaciones.append({"op": "add_partidos", "partidos": [{
+                    "id": siguiente, "pareja1_id": pareja1_id, "pareja2_id": pareja2_id,
+                    "ganador_id": aleatorio.choice([None, pareja1_id, pareja2_id]), "fecha": "2024-01-01"}]})
+            elif torneo["partidos"]:
+                partido = aleatorio.choice(torneo["partidos"])
+                operaciones.append({"op": "set_resultado", "partido_id": partido["id"], "ganador_id": aleatorio.choice(
+                    [None, partido["pareja1_id"], partido["pareja2_id"]])})
+            # Cada operación se aplica ya para que la siguiente vea los ids nuevos, como en un commit real
+            torneo_core.apply_operation(torneo, operaciones[-1])
+        clasificacion = clasificacion.derive(operaciones)
+        esperada = torneo_core.Standings.from_tournament(torneo["parejas"], torneo["partidos"])
+        assert clasificacion.orden == esperada.orden
+        assert clasificacion.estadisticas == esperada.estadisticas
+
+
+def _mismos_ratings(a, b):
+    assert a.keys() == b.keys()
+    for pareja_id in a:
+        assert a[pareja_id] == pytest.approx(b[pareja_id], abs=1e-9)
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_elo_vectorizado_igual_que_secuencial(semilla):
+    pytest.importorskip("numpy")
+    torneo = generar_torneo(60, 0.8, jornadas=12, semilla=semilla)
+    # Partidos repetidos y sin jornada: obligan a varios niveles por jornada
+    aleatorio = random.Random(semilla)
+    for partido in aleatorio.sample(torneo["partidos"], 40):
+        torneo["partidos"].append(dict(partido, id=len(torneo["partidos"]) + 1, jornada=None))
+    vectorizado = torneo_core.EloRatings.from_tournament(torneo["parejas"], torneo["partidos"])
+    secuencial = torneo_core.EloRatings.from_tournament(torneo["parejas"], torneo["partidos"], vectorizado=False)
+    _mismos_ratings(vectorizado.ratings, secuencial.ratings)
+    assert vectorizado.ultimo == secuencial.ultimo
+
+
+def test_elo_ignora_ganadores_que_no_juegan_el_partido():
+    torneo = generar_torneo(4, 0, jornadas=3)
+    torneo["partidos"][0]["ganador_id"] = 999
+    elo = torneo_core.EloRatings.from_tournament(torneo["parejas"], torneo["partidos"])
+    assert set(elo.ratings.values()) == {torneo_core.ELO_INICIAL}
+
+
+def test_elo_incremental_igual_que_recalculo(torneo_vacio):
+    tp = torneo_vacio
+    aleatorio = random.Random(3)
+    for i in range(12):
+        tp.add_pareja(f"A{i}", f"B{i}")
+    for _ in range(120):
+        modelo = tp.get_tournament_model()
+        modelo.elo
+        if not modelo.partidos_pendientes or aleatorio.random() < 0.1:
+            tp.generate_jornada()
+        elif modelo.partidos_completados and aleatorio.random() < 0.15:
+            partido = aleatorio.choice(modelo.partidos_completados)
+            tp.update_resultado(partido["id"], aleatorio.choice([None, partido["pareja1_id"]]))
+        else:
+            partido = aleatorio.choice(modelo.partidos_pendientes)
+            tp.update_resultado(partido["id"], aleatorio.choice([partido["pareja1_id"], partido["pareja2_id"]]))
+        modelo = tp.get_tournament_model()
+        recalculado = tp.EloRatings.from_tournament(modelo.parejas, modelo.partidos)
+        _mismos_ratings(modelo.elo.ratings, recalculado.ratings)
+
+
+def _jugar_pendientes(tp):
+    for partido in tp.get_tournament_model().partidos_pendientes:
+        tp.update_resultado(partido["id"], partido["pareja1_id"])
+
+
+def _partidos_sin_pareja(tp):
+    modelo = tp.get_tournament_model()
+    return [p for p in modelo.partidos
+            if p["pareja1_id"] not in modelo.pareja_por_id or p["pareja2_id"] not in modelo.pareja_por_id]
+
+
+def test_grupos_no_emparejan_parejas_eliminadas(torneo_vacio):
+    tp = torneo_vacio
+    for i in range(8):
+        tp.add_pareja(f"A{i}", f"B{i}")
+    tp.set_formato({"tipo": "grupos", "num_grupos": 2, "clasifican": 2, "sembrado": False})
+    assert tp.generate_jornada()[0]
+    tp.remove_pareja(tp.get_formato()["grupos"][0][0])
+    while tp.generate_jornada()[0]:
+        assert not _partidos_sin_pareja(tp)
+        _jugar_pendientes(tp)
+    assert tp.get_tournament_model().partidos_completados
+
+
+def test_cuadro_pasa_al_rival_de_una_pareja_eliminada(torneo_vacio):
+    tp = torneo_vacio
+    for i in range(8):
+        tp.add_pareja(f"A{i}", f"B{i}")
+    tp.set_formato({"tipo": "grupos", "num_grupos": 2, "clasifican": 2, "sembrado": False})
+    while "cuadro" not in tp.get_formato():
+        assert tp.generate_jornada()[0]
+        _jugar_pendientes(tp)
+    # Semifinales generadas: se elimina una pareja antes y otra después de jugar su partido
+    semifinales = [tp.get_tournament_model().partido(i) for i in tp.get_formato()["cuadro"]["partidos"][-1]]
+    tp.remove_pareja(semifinales[0]["pareja1_id"])
+    tp.update_resultado(semifinales[1]["id"], semifinales[1]["pareja2_id"])
+    success, message = tp.generate_jornada()
+    assert success, message
+    final = tp.get_tournament_model().partidos_pendientes
+    assert [(p["pareja1_id"], p["pareja2_id"]) for p in final] == [
+        (semifinales[0]["pareja2_id"], semifinales[1]["pareja2_id"])]
+    tp.remove_pareja(semifinales[1]["pareja2_id"])
+    success, message = tp.generate_jornada()
+    assert not success and "Campeones" in message
+    assert not _partidos_sin_pareja(tp)
+
+
+@pytest.mark.parametrize("modo", ["json", "journal", "sqlite"])
+def test_remove_pareja_mantiene_contadores_de_los_rivales(torneo_vacio, monkeypatch, modo):
+    tp = torneo_vacio
+    monkeypatch.setattr(tp, "STORAGE_MODE", modo)
+    aleatorio = random.Random(5)
+    for i in range(8):
+        tp.add_pareja(f"A{i}", f"B{i}")
+    for _ in range(4):
+        tp.generate_jornada()
+        _jugar_pendientes(tp)
+    tp.generate_jornada()
+    for pareja_id in aleatorio.sample(sorted(tp.get_tournament_model().pareja_por_id), 3):
+        assert tp.remove_pareja(pareja_id)[0]
+        assert tp.check_contadores() == []
+    # Un proceso nuevo lee los mismos contadores del almacenamiento
+    tp._store = None
+    assert tp.check_contadores() == []
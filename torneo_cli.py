@@ -0,0 +1,101 @@
+# Línea de comandos para operar el torneo sin levantar la app: pensada para scripts y tareas programadas.
+# Usa el mismo almacenamiento que la app (PADEL_STORAGE) y los ficheros del directorio actual.
+#   python torneo_cli.py generar
+#   python torneo_cli.py resultado 12:3 13:5 14:
+#   python torneo_cli.py clasificacion --formato csv --salida clasificacion.csv
+#   python torneo_cli.py importar parejas.csv
+#   python torneo_cli.py reiniciar --confirmar
+import argparse
+import csv
+import json
+import sys
+
+import torneo_core
+
+
+def _parse_resultado(texto):
+    # "partido:ganador"; sin ganador se borra el resultado
+    partido_id, _, ganador_id = texto.partition(":")
+    try:
+        return int(partido_id), int(ganador_id) if ganador_id else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Resultado no válido: {texto} (se espera partido:ganador)")
+
+
+def cmd_generar(args):
+    return torneo_core.generate_jornada()
+
+
+def cmd_resultado(args):
+    return torneo_core.update_resultados(args.resultados)
+
+
+def cmd_clasificacion(args):
+    filas = []
+    for posicion, pareja in enumerate(torneo_core.get_clasificacion(), 1):
+        jugados = pareja["victorias"] + pareja["derrotas"]
+        filas.append({
+            "posicion": posicion,
+            "id": pareja["id"],
+            "pareja": " & ".join(pareja["jugadores"]),
+            "jugados": jugados,
+            "victorias": pareja["victorias"],
+            "derrotas": pareja["derrotas"],
+            "porcentaje": round(pareja["victorias"] / jugados * 100, 1) if jugados else 0.0
+        })
+    salida = open(args.salida, "w", encoding="utf-8", newline="") if args.salida else sys.stdout
+    try:
+        if args.formato == "json":
+            json.dump(filas, salida, ensure_ascii=False, indent=2)
+            salida.write("\n")
+        else:
+            escritor = csv.DictWriter(salida, fieldnames=["posicion", "id", "pareja", "jugados", "victorias",
+                                                          "derrotas", "porcentaje"])
+            escritor.writeheader()
+            escritor.writerows(filas)
+    finally:
+        if args.salida:
+            salida.close()
+    return True, f"Clasificación exportada ({len(filas)} parejas)"
+
+
+def cmd_importar(args):
+    with open(args.fichero, encoding="utf-8-sig", newline="") as fichero:
+        success, message, errores = torneo_core.import_tournament_file(fichero, args.fichero)
+    for linea, error in errores:
+        print(f"línea {linea}: {error}", file=sys.stderr)
+    return success, message
+
+
+def cmd_reiniciar(args):
+    if not args.confirmar:
+        return False, "Reiniciar borra todas las parejas y partidos: repite con --confirmar"
+    return torneo_core.reset_tournament()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gestión del torneo de pádel desde la línea de comandos")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("generar", help="genera la siguiente jornada o ronda según el formato").set_defaults(
+        func=cmd_generar)
+    resultado = comandos.add_parser("resultado", help="guarda resultados partido:ganador en un solo commit")
+    resultado.add_argument("resultados", nargs="+", type=_parse_resultado)
+    resultado.set_defaults(func=cmd_resultado)
+    clasificacion = comandos.add_parser("clasificacion", help="exporta la clasificación")
+    clasificacion.add_argument("--formato", choices=["csv", "json"], default="csv")
+    clasificacion.add_argument("--salida", help="fichero de salida (por defecto la salida estándar)")
+    clasificacion.set_defaults(func=cmd_clasificacion)
+    importar = comandos.add_parser("importar", help="importa parejas y resultados desde CSV o JSONL")
+    importar.add_argument("fichero")
+    importar.set_defaults(func=cmd_importar)
+    reiniciar = comandos.add_parser("reiniciar", help="borra todas las parejas y partidos")
+    reiniciar.add_argument("--confirmar", action="store_true")
+    reiniciar.set_defaults(func=cmd_reiniciar)
+    args = parser.parse_args(argv)
+    success, message = args.func(args)
+    print(f"{'✅' if success else '❌'} {message}", file=sys.stderr if args.comando == "clasificacion" else sys.stdout)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2218 @@
+# Lógica del torneo y almacenamiento, sin dependencias de Streamlit ni pandas: la usan la app (torneo_padel.py),
+# la línea de comandos (torneo_cli.py) y cualquier script que necesite leer o modificar el torneo.
+import atexit
+import bisect
+import collections
+import copy
+import csv
+import functools
+import io
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se serializan las escrituras dentro del proceso
+    fcntl = None
+
+# Archivos de datos del torneo
+TORNEO_FILE = "torneo_parejas.json"
+TORNEO_JOURNAL_FILE = "torneo_parejas.journal.jsonl"
+TORNEO_DB_FILE = "torneo.db"
+
+# Almacenamiento del torneo: "json" reescribe el fichero completo, "journal" añade operaciones al diario
+# y "sqlite" guarda por filas en TORNEO_DB_FILE (importando TORNEO_FILE la primera vez)
+STORAGE_MODE = os.environ.get("PADEL_STORAGE", "json")
+JOURNAL_COMPACT_EVERY = 200
+# Durabilidad de las escrituras de ficheros JSON completos (modo "json" y usuarios): "sync" escribe antes de
+# devolver el control; "deferred" publica el cambio en memoria y un hilo lo escribe agrupando las mutaciones que
+# llegan en WRITE_BEHIND_SECONDS. En "deferred" la app debe ser el único proceso que escribe esos ficheros.
+DURABILITY = os.environ.get("PADEL_DURABILITY", "sync")
+WRITE_BEHIND_SECONDS = float(os.environ.get("PADEL_WRITE_BEHIND_SECONDS", "0.5"))
+# Partidos pendientes que guarda el resumen del torneo (los primeros por id)
+SUMMARY_NEXT_PENDING = 10
+# Elo de las parejas: puntuación inicial y factor K
+ELO_INICIAL = 1500.0
+ELO_K = 32.0
+# Reintentos de una mutación cuando otro usuario confirma un cambio entre la lectura y la escritura
+MAX_COMMIT_RETRIES = 10
+COMMIT_BACKOFF_SECONDS = 0.005
+# Límite de vueltas atrás al emparejar una ronda suiza antes de aceptar cruces repetidos
+SWISS_MAX_BACKTRACKS = 20000
+# Clasificación histórica: partidos jugados entre dos checkpoints (como mínimo; si hay más parejas, una por pareja)
+HISTORY_CHECKPOINT_EVERY = 50
+
+
+# Los errores de lectura/escritura se notifican con report_error; la app lo redirige a st.error
+_error_handler = logging.getLogger("torneo").error
+
+
+def set_error_handler(handler):
+    global _error_handler
+    _error_handler = handler
+
+
+def report_error(mensaje):
+    _error_handler(mensaje)
+
+
+# Instrumentación: una ejecución (un rerun de la app, un comando...) abre una medición con measure_run() y las
+# funciones de E/S anotan en ella tiempos, bytes leídos/escritos y parseos JSON. La medición es por hilo, porque
+# cada sesión de Streamlit ejecuta su script en un hilo propio; sin medición abierta no se anota nada.
+class RunMetrics:
+    def __init__(self):
+        self.tiempos = {}
+        self.bytes_leidos = 0
+        self.bytes_escritos = 0
+        self.parseos_json = 0
+        self.duracion_ms = None
+
+    def add_time(self, nombre, ms):
+        self.tiempos[nombre] = self.tiempos.get(nombre, 0) + ms
+
+    def as_dict(self):
+        return {"ms": round(self.duracion_ms or 0, 2),
+                "tiempos": {nombre: round(ms, 2) for nombre, ms in self.tiempos.items()},
+                "bytes_leidos": self.bytes_leidos, "bytes_escritos": self.bytes_escritos,
+                "parseos_json": self.parseos_json}
+
+
+_medicion = threading.local()
+
+
+@contextmanager
+def measure_run():
+    metricas = RunMetrics()
+    anterior = getattr(_medicion, "actual", None)
+    _medicion.actual = metricas
+    inicio = time.perf_counter()
+    try:
+        yield metricas
+    finally:
+        metricas.duracion_ms = (time.perf_counter() - inicio) * 1000
+        _medicion.actual = anterior
+
+
+def current_metrics():
+    return getattr(_medicion, "actual", None)
+
+
+@contextmanager
+def timed(nombre):
+    metricas = current_metrics()
+    if metricas is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        metricas.add_time(nombre, (time.perf_counter() - inicio) * 1000)
+
+
+def record_io(leidos=0, escritos=0, parseos=0):
+    metricas = current_metrics()
+    if metricas is not None:
+        metricas.bytes_leidos += leidos
+        metricas.bytes_escritos += escritos
+        metricas.parseos_json += parseos
+
+
+def percentile(valores, p):
+    # Percentil por rango más cercano de una lista ya ordenada
+    if not valores:
+        return None
+    return valores[min(len(valores) - 1, max(0, -(-len(valores) * p // 100) - 1))]
+
+
+# Agregado de las últimas ejecuciones por página, compartido por todas las sesiones del proceso
+class RunStats:
+    def __init__(self, max_muestras=500):
+        self._lock = threading.Lock()
+        self.max_muestras = max_muestras
+        self.por_pagina = {}
+        self.total = 0
+
+    def add(self, pagina, metricas):
+        with self._lock:
+            self.total += 1
+            self.por_pagina.setdefault(pagina, collections.deque(maxlen=self.max_muestras)).append(metricas)
+
+    def summary(self):
+        with self._lock:
+            muestras = {pagina: list(cola) for pagina, cola in self.por_pagina.items()}
+        filas = []
+        for pagina, ejecuciones in sorted(muestras.items()):
+            duraciones = sorted(m.duracion_ms for m in ejecuciones)
+            n = len(ejecuciones)
+            filas.append({"pagina": pagina, "reruns": n,
+                          "p50_ms": round(percentile(duraciones, 50), 1),
+                          "p95_ms": round(percentile(duraciones, 95), 1),
+                          "kb_leidos": round(sum(m.bytes_leidos for m in ejecuciones) / n / 1024, 1),
+                          "kb_escritos": round(sum(m.bytes_escritos for m in ejecuciones) / n / 1024, 1),
+                          "parseos_json": round(sum(m.parseos_json for m in ejecuciones) / n, 2)})
+        return filas
+
+    def timers(self):
+        # (nombre, veces, p50, p95) de cada temporizador sobre las ejecuciones en las que aparece
+        with self._lock:
+            ejecuciones = [m for cola in self.por_pagina.values() for m in cola]
+        tiempos = {}
+        for metricas in ejecuciones:
+            for nombre, ms in metricas.tiempos.items():
+                tiempos.setdefault(nombre, []).append(ms)
+        return [{"temporizador": nombre, "ejecuciones": len(valores),
+                 "p50_ms": round(percentile(sorted(valores), 50), 2),
+                 "p95_ms": round(percentile(sorted(valores), 95), 2)}
+                for nombre, valores in sorted(tiempos.items())]
+
+
+# Utilidades JSON
+def load_json(filename, default_content=None):
+    if default_content is None:
+        default_content = {}
+    escritor = _writers.get(filename)
+    if escritor is not None:
+        # Un cambio todavía en la cola de escritura es más reciente que el fichero
+        pendiente = escritor.latest()
+        if pendiente is not None:
+            return copy.deepcopy(pendiente)
+    try:
+        if os.path.exists(filename):
+            with timed("load_json"), open(filename, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+                record_io(leidos=os.fstat(f.fileno()).st_size, parseos=1)
+                return datos
+        else:
+            save_json(filename, default_content)
+            return default_content
+    except Exception as e:
+        report_error(f"Error cargando {filename}: {e}")
+        return default_content
+
+
+def write_json_temp(filename, data):
+    # Fichero temporal en el mismo directorio para que os.replace sea atómico
+    temporal = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with timed("save_json"), open(temporal, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+        record_io(escritos=f.tell())
+    return temporal
+
+
+def save_json(filename, data):
+    try:
+        os.replace(write_json_temp(filename, data), filename)
+        return True
+    except Exception as e:
+        report_error(f"Error guardando {filename}: {e}")
+        return False
+
+
+# Escritura diferida (write-behind) de un fichero JSON: submit() solo encola el último contenido y el hilo lo
+# escribe de forma atómica tras la ventana de agrupación, de modo que una ráfaga de cambios acaba en una sola
+# escritura. flush() escribe lo pendiente en el hilo que llama; al salir del proceso se vacían todas las colas.
+class WriteBehind:
+    def __init__(self, filename, ventana, al_escribir=None):
+        self.filename = filename
+        self.ventana = ventana
+        self.al_escribir = al_escribir
+        self._cond = threading.Condition()
+        self._escritura = threading.Lock()
+        self._pendiente = None
+        self._ultimo = None
+        self._en_curso = False
+        self._hilo = None
+        self.escrituras = 0
+        self.agrupadas = 0
+        self.errores = 0
+
+    def submit(self, datos):
+        with self._cond:
+            if self._pendiente is not None:
+                self.agrupadas += 1
+            self._pendiente = datos
+            self._ultimo = datos
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._run, name=f"write-behind {self.filename}", daemon=True)
+                self._hilo.start()
+            self._cond.notify_all()
+
+    def dirty(self):
+        with self._cond:
+            return self._pendiente is not None or self._en_curso
+
+    def latest(self):
+        # Último contenido encolado si aún no está en disco
+        with self._cond:
+            return self._ultimo if self._pendiente is not None or self._en_curso else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pendiente is None:
+                    self._cond.wait()
+            time.sleep(self.ventana)
+            self.flush()
+
+    def flush(self):
+        # El bloqueo de escritura serializa hilo y flush(): quien toma lo pendiente siempre toma lo más reciente
+        with self._escritura:
+            with self._cond:
+                datos = self._pendiente
+                if datos is None:
+                    return True
+                self._pendiente = None
+                self._en_curso = True
+            try:
+                with file_lock(self.filename):
+                    os.replace(write_json_temp(self.filename, datos), self.filename)
+                correcto = True
+            except Exception as e:
+                # Fuera de la sesión de la app: se registra y se reintenta en la siguiente ventana
+                logging.getLogger("torneo").error(f"Error guardando {self.filename}: {e}")
+                correcto = False
+            if correcto and self.al_escribir is not None:
+                self.al_escribir(datos)
+            with self._cond:
+                self._en_curso = False
+                if correcto:
+                    self.escrituras += 1
+                else:
+                    self.errores += 1
+                    if self._pendiente is None:
+                        self._pendiente = datos
+                self._cond.notify_all()
+            return correcto
+
+    def stats(self):
+        with self._cond:
+            return {"fichero": self.filename, "escrituras": self.escrituras, "agrupadas": self.agrupadas,
+                    "errores": self.errores, "pendiente": self._pendiente is not None or self._en_curso}
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(filename, al_escribir=None):
+    with _writers_lock:
+        escritor = _writers.get(filename)
+        if escritor is None:
+            escritor = _writers[filename] = WriteBehind(filename, WRITE_BEHIND_SECONDS)
+        if al_escribir is not None:
+            escritor.al_escribir = al_escribir
+        return escritor
+
+
+def persist_json(filename, data):
+    # save_json respetando DURABILITY
+    if DURABILITY == "deferred":
+        get_writer(filename).submit(data)
+        return True
+    return save_json(filename, data)
+
+
+def flush_writes():
+    return all([escritor.flush() for escritor in list(_writers.values())])
+
+
+def write_behind_stats():
+    return [escritor.stats() for escritor in list(_writers.values())]
+
+
+atexit.register(flush_writes)
+
+
+@contextmanager
+def file_lock(filename):
+    if fcntl is None:
+        yield
+        return
+    with open(f"{filename}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def file_signature(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Campos de un partido que solo cambian las operaciones específicas (add_partidos, set_resultado)
+PARTIDO_CORE_FIELDS = ("id", "pareja1_id", "pareja2_id", "ganador_id")
+
+
+# Operaciones sobre el torneo: los mutadores describen el cambio y el almacenamiento lo aplica y persiste.
+# Se aplican sobre una copia superficial del snapshot: los dicts de parejas y partidos que cambian se sustituyen
+# por copias nuevas y nunca se modifican en su sitio, porque otras sesiones pueden estar leyéndolos.
+def apply_operation(torneo, operacion):
+    tipo = operacion["op"]
+    if tipo == "add_pareja":
+        torneo["parejas"].append(dict(operacion["pareja"]))
+    elif tipo == "remove_pareja":
+        pareja_id = operacion["pareja_id"]
+        torneo["parejas"] = [p for p in torneo["parejas"] if p["id"] != pareja_id]
+        torneo["partidos"] = [p for p in torneo["partidos"] if
+                              p["pareja1_id"] != pareja_id and p["pareja2_id"] != pareja_id]
+    elif tipo == "add_partidos":
+        torneo["partidos"].extend(dict(p) for p in operacion["partidos"])
+    elif tipo == "set_resultado":
+        _apply_resultado(torneo, operacion["partido_id"], operacion["ganador_id"])
+    elif tipo == "update_partidos":
+        cambios = dict((partido_id, campos) for partido_id, campos in operacion["cambios"])
+        if any(campo in PARTIDO_CORE_FIELDS for campos in cambios.values() for campo in campos):
+            raise ValueError("update_partidos no puede cambiar parejas ni resultados")
+        torneo["partidos"] = [dict(p, **cambios[p["id"]]) if p["id"] in cambios else p for p in torneo["partidos"]]
+    elif tipo == "set_meta":
+        torneo[operacion["clave"]] = operacion["valor"]
+    elif tipo == "set_contadores":
+        contadores = {pareja_id: (victorias, derrotas) for pareja_id, victorias, derrotas in operacion["contadores"]}
+        torneo["parejas"] = [dict(p, victorias=contadores[p["id"]][0], derrotas=contadores[p["id"]][1])
+                             if p["id"] in contadores else p for p in torneo["parejas"]]
+    elif tipo == "reset":
+        for clave in [c for c in torneo if c != "version"]:
+            del torneo[clave]
+        torneo["parejas"] = []
+        torneo["partidos"] = []
+    else:
+        raise ValueError(f"Operación desconocida: {tipo}")
+
+
+def _apply_resultado(torneo, partido_id, ganador_id):
+    partidos = torneo["partidos"]
+    for i, partido in enumerate(partidos):
+        if partido["id"] == partido_id:
+            break
+    else:
+        return
+    anterior = partido["ganador_id"]
+    partidos[i] = dict(partido, ganador_id=ganador_id)
+    participantes = (partido["pareja1_id"], partido["pareja2_id"])
+    parejas = torneo["parejas"]
+    for j, pareja in enumerate(parejas):
+        if pareja["id"] in participantes:
+            pareja = dict(pareja)
+            for ganador, delta in ((anterior, -1), (ganador_id, 1)):
+                if ganador:
+                    pareja["victorias" if pareja["id"] == ganador else "derrotas"] += delta
+            parejas[j] = pareja
+
+
+def _copy_tournament(torneo):
+    copia = dict(torneo)
+    copia["parejas"] = list(torneo["parejas"])
+    copia["partidos"] = list(torneo["partidos"])
+    return copia
+
+
+# Clasificación calculada a partir de los partidos. Criterios: más victorias, menos derrotas (con las mismas
+# victorias equivale a mayor % de victorias), enfrentamiento directo entre las parejas que siguen empatadas y,
+# por último, el id.
+# Cada instancia corresponde a un snapshot; derive() produce la del siguiente sin reordenar toda la tabla.
+class Standings:
+    def __init__(self, estadisticas, directos, resultados, orden):
+        self.estadisticas = estadisticas
+        self.directos = directos
+        self.resultados = resultados
+        self.orden = orden
+        self._filas = None
+
+    @classmethod
+    def from_tournament(cls, parejas, partidos):
+        clasificacion = cls({p["id"]: (0, 0) for p in parejas}, {}, {}, [])
+        for partido in partidos:
+            clasificacion._add_partido(partido)
+        clasificacion._sort_all()
+        return clasificacion
+
+    def _sort_all(self):
+        self.orden = sorted(self.estadisticas, key=self._clave)
+        self._filas = None
+        inicio = 0
+        while inicio < len(self.orden):
+            fin = bisect.bisect_right(self.orden, self._clave(self.orden[inicio]), lo=inicio, key=self._clave)
+            self._sort_tied(inicio, fin)
+            inicio = fin
+
+    def _clave(self, pareja_id):
+        victorias, derrotas = self.estadisticas[pareja_id]
+        return -victorias, derrotas
+
+    def _add_partido(self, partido):
+        self.resultados[partido["id"]] = (partido["pareja1_id"], partido["pareja2_id"], None)
+        if partido["ganador_id"]:
+            self._set_resultado(partido["id"], partido["ganador_id"])
+
+    def _set_resultado(self, partido_id, ganador_id):
+        pareja1_id, pareja2_id, anterior = self.resultados[partido_id]
+        for ganador, delta in ((anterior, -1), (ganador_id, 1)):
+            if not ganador:
+                continue
+            perdedor = pareja2_id if ganador == pareja1_id else pareja1_id
+            if ganador in self.estadisticas:
+                victorias, derrotas = self.estadisticas[ganador]
+                self.estadisticas[ganador] = victorias + delta, derrotas
+            if perdedor in self.estadisticas:
+                victorias, derrotas = self.estadisticas[perdedor]
+                self.estadisticas[perdedor] = victorias, derrotas + delta
+            self.directos[(ganador, perdedor)] = self.directos.get((ganador, perdedor), 0) + delta
+        self.resultados[partido_id] = (pareja1_id, pareja2_id, ganador_id)
+        return pareja1_id, pareja2_id
+
+    def _sort_tied(self, inicio, fin):
+        if fin - inicio < 2:
+            return
+        empatadas = self.orden[inicio:fin]
+
+        def puntos_directos(pareja_id):
+            return sum(self.directos.get((pareja_id, rival), 0) for rival in empatadas if rival != pareja_id)
+
+        self.orden[inicio:fin] = sorted(empatadas, key=lambda p: (-puntos_directos(p), p))
+
+    def _segment(self, clave, key):
+        inicio = bisect.bisect_left(self.orden, clave, key=key)
+        return inicio, bisect.bisect_right(self.orden, clave, lo=inicio, key=key)
+
+    def derive(self, operaciones):
+        # None si alguna operación obliga a recalcular desde cero (bajas de parejas, reinicio...)
+        nueva = Standings(dict(self.estadisticas), dict(self.directos), dict(self.resultados), list(self.orden))
+        claves_anteriores = {}
+        for operacion in operaciones:
+            tipo = operacion["op"]
+            if tipo == "add_pareja":
+                pareja_id = operacion["pareja"]["id"]
+                nueva.estadisticas[pareja_id] = (0, 0)
+                claves_anteriores.setdefault(pareja_id, None)
+            elif tipo in ("add_partidos", "set_resultado"):
+                if tipo == "add_partidos":
+                    cambios = []
+                    for partido in operacion["partidos"]:
+                        nueva.resultados[partido["id"]] = (partido["pareja1_id"], partido["pareja2_id"], None)
+                        if partido["ganador_id"]:
+                            cambios.append((partido["id"], partido["ganador_id"]))
+                else:
+                    if operacion["partido_id"] not in nueva.resultados:
+                        continue
+                    cambios = [(operacion["partido_id"], operacion["ganador_id"])]
+                for partido_id, ganador_id in cambios:
+                    pareja1_id, pareja2_id = nueva.resultados[partido_id][:2]
+                    for pareja_id in (pareja1_id, pareja2_id):
+                        if pareja_id in nueva.estadisticas and pareja_id not in claves_anteriores:
+                            claves_anteriores[pareja_id] = nueva._clave(pareja_id)
+                    nueva._set_resultado(partido_id, ganador_id)
+            elif tipo not in ("set_contadores", "set_meta", "update_partidos"):
+                return None
+        if claves_anteriores:
+            nueva._reposition(claves_anteriores)
+        return nueva
+
+    def _reposition(self, claves_anteriores):
+        # Se sacan las parejas afectadas con su clave anterior y se reinsertan con la nueva; después solo se
+        # reordenan por enfrentamiento directo los grupos de empatadas que han cambiado.
+        def clave_en_lista(pareja_id):
+            anterior = claves_anteriores.get(pareja_id)
+            return anterior if anterior is not None else self._clave(pareja_id)
+
+        for pareja_id, clave in claves_anteriores.items():
+            if clave is None:
+                continue
+            inicio, fin = self._segment(clave, clave_en_lista)
+            del self.orden[self.orden.index(pareja_id, inicio, fin)]
+        for pareja_id in claves_anteriores:
+            bisect.insort(self.orden, pareja_id, key=self._clave)
+        claves = {clave for clave in claves_anteriores.values() if clave is not None}
+        claves.update(self._clave(pareja_id) for pareja_id in claves_anteriores)
+        for clave in claves:
+            self._sort_tied(*self._segment(clave, self._clave))
+
+    def filas(self, pareja_por_id):
+        if self._filas is None:
+            self._filas = [dict(pareja_por_id[pareja_id], victorias=self.estadisticas[pareja_id][0],
+                                derrotas=self.estadisticas[pareja_id][1])
+                           for pareja_id in self.orden]
+        return self._filas
+
+    def discrepancies(self, parejas):
+        return [(pareja["id"], (pareja["victorias"], pareja["derrotas"]), self.estadisticas[pareja["id"]])
+                for pareja in parejas
+                if (pareja["victorias"], pareja["derrotas"]) != self.estadisticas[pareja["id"]]]
+
+
+# Clasificación histórica ("a fecha de" o "tras la jornada"). Los partidos jugados se indexan ordenados por la
+# clave elegida y cada HISTORY_CHECKPOINT_EVERY partidos se guarda una copia de las estadísticas y los
+# enfrentamientos directos; una consulta parte del checkpoint anterior y solo reproduce los partidos desde él.
+# Las parejas dadas de alta más tarde aparecen con 0-0. Una instancia por snapshot y clave, como Standings.
+class StandingsHistory:
+    def __init__(self, parejas, partidos, clave="fecha"):
+        self.clave = clave
+        self.parejas = parejas
+        self.partidos = sorted((p for p in partidos if p["ganador_id"]), key=lambda p: (self._valor(p), p["id"]))
+        self.valores = [self._valor(p) for p in self.partidos]
+        self.cada = max(HISTORY_CHECKPOINT_EVERY, len(parejas))
+        estado = self._vacia()
+        self.checkpoints = []
+        for i, partido in enumerate(self.partidos):
+            if i % self.cada == 0:
+                self.checkpoints.append((dict(estado.estadisticas), dict(estado.directos)))
+            estado._add_partido(partido)
+        if not self.checkpoints:
+            self.checkpoints.append(({}, {}))
+
+    def _valor(self, partido):
+        if self.clave == "jornada":
+            return partido.get("jornada") or 0
+        return partido.get("fecha") or ""
+
+    def _vacia(self):
+        return Standings({p["id"]: (0, 0) for p in self.parejas}, {}, {}, [])
+
+    def _limite(self, valor):
+        # Una fecha sin hora incluye todo ese día
+        if self.clave == "fecha" and len(valor) == 10:
+            return valor + "T\uffff"
+        return valor
+
+    def puntos(self):
+        # Valores distintos de la clave en los que cambia la clasificación (días o jornadas)
+        if self.clave == "fecha":
+            return sorted({valor[:10] for valor in self.valores if valor})
+        return sorted(set(self.valores))
+
+    def as_of(self, valor):
+        fin = bisect.bisect_right(self.valores, self._limite(valor))
+        indice = min(fin // self.cada, len(self.checkpoints) - 1)
+        clasificacion = self._vacia()
+        estadisticas, directos = self.checkpoints[indice]
+        clasificacion.estadisticas.update(estadisticas)
+        clasificacion.directos = dict(directos)
+        for partido in self.partidos[indice * self.cada:fin]:
+            clasificacion._add_partido(partido)
+        clasificacion._sort_all()
+        return clasificacion
+
+    def positions(self, puntos, pareja_ids):
+        # {pareja_id: [posición en cada punto]} en un único recorrido del índice
+        estado = self._vacia()
+        posiciones = {pareja_id: [] for pareja_id in pareja_ids}
+        i = 0
+        for punto in puntos:
+            limite = self._limite(punto)
+            while i < len(self.partidos) and self.valores[i] <= limite:
+                estado._add_partido(self.partidos[i])
+                i += 1
+            estado._sort_all()
+            posicion = {pareja_id: n for n, pareja_id in enumerate(estado.orden, 1)}
+            for pareja_id, serie in posiciones.items():
+                serie.append(posicion.get(pareja_id))
+        return posiciones
+
+
+def _find_by_id(elementos, elemento_id):
+    # parejas y partidos están ordenados por id (los ids nuevos siempre son el máximo + 1)
+    i = bisect.bisect_left(elementos, elemento_id, key=lambda e: e["id"])
+    return elementos[i] if i < len(elementos) and elementos[i]["id"] == elemento_id else None
+
+
+# Elo de cada pareja. Orden canónico de los partidos: (jornada, id). Un resultado nuevo se aplica en O(1) si es
+# posterior en ese orden a todos los ya puntuados de sus dos parejas, porque entonces no altera ningún otro
+# partido; si se corrige o borra un resultado, o llega uno anterior, derive() devuelve None y se recalcula todo.
+# El recálculo agrupa los partidos por niveles de dependencia (cada nivel no repite pareja, así que aplicarlo de
+# una vez equivale a aplicarlo en orden) y procesa cada nivel con operaciones vectorizadas.
+class EloRatings:
+    def __init__(self, ratings, ultimo):
+        self.ratings = ratings
+        self.ultimo = ultimo
+
+    @staticmethod
+    def _orden(partido):
+        return partido.get("jornada") or 0, partido["id"]
+
+    @staticmethod
+    def _delta(rating_ganador, rating_perdedor):
+        return ELO_K * (1 - 1 / (1 + 10 ** ((rating_perdedor - rating_ganador) / 400)))
+
+    @classmethod
+    def from_tournament(cls, parejas, partidos, vectorizado=True):
+        # NumPy se importa aquí para no cargarlo con el módulo; sin él se recalcula partido a partido
+        np = None
+        if vectorizado:
+            try:
+                import numpy as np
+            except ImportError:
+                pass
+        ids = [pareja["id"] for pareja in parejas]
+        indice = {pareja_id: i for i, pareja_id in enumerate(ids)}
+        # (clave de orden, ganador, perdedor) con índices de pareja; los ids de partido no se repiten
+        jugados = sorted(((p.get("jornada") or 0, p["id"]), indice[p["ganador_id"]],
+                          indice[p["pareja2_id"] if p["ganador_id"] == p["pareja1_id"] else p["pareja1_id"]])
+                         for p in partidos
+                         if p["ganador_id"] in (p["pareja1_id"], p["pareja2_id"]) and p["pareja1_id"] in indice
+                         and p["pareja2_id"] in indice)
+        ganadores = [ganador for _, ganador, _ in jugados]
+        perdedores = [perdedor for _, _, perdedor in jugados]
+        ultimo = {}
+        for clave, ganador, perdedor in jugados:
+            ultimo[ids[ganador]] = ultimo[ids[perdedor]] = clave
+        if np is None:
+            ratings = [ELO_INICIAL] * len(ids)
+            for ganador, perdedor in zip(ganadores, perdedores):
+                delta = cls._delta(ratings[ganador], ratings[perdedor])
+                ratings[ganador] += delta
+                ratings[perdedor] -= delta
+            return cls(dict(zip(ids, ratings)), ultimo)
+        niveles = []
+        nivel_pareja = [-1] * len(ids)
+        for ganador, perdedor in zip(ganadores, perdedores):
+            nivel = nivel_pareja[ganador] if nivel_pareja[ganador] > nivel_pareja[perdedor] else nivel_pareja[perdedor]
+            nivel_pareja[ganador] = nivel_pareja[perdedor] = nivel + 1
+            niveles.append(nivel + 1)
+        ratings = np.full(len(ids), ELO_INICIAL)
+        if jugados:
+            ganadores = np.array(ganadores)
+            perdedores = np.array(perdedores)
+            orden = np.argsort(np.array(niveles), kind="stable")
+            limites = np.cumsum(np.bincount(niveles))[:-1]
+            for seleccion in np.split(orden, limites):
+                g = ganadores[seleccion]
+                d = perdedores[seleccion]
+                delta = ELO_K * (1 - 1 / (1 + 10 ** ((ratings[d] - ratings[g]) / 400)))
+                ratings[g] += delta
+                ratings[d] -= delta
+        return cls(dict(zip(ids, ratings.tolist())), ultimo)
+
+    def derive(self, anterior, nuevo, operaciones):
+        # anterior y nuevo: modelos antes y después de las operaciones
+        tocados = set()
+        for operacion in operaciones:
+            tipo = operacion["op"]
+            if tipo == "add_pareja":
+                tocados.add(("pareja", operacion["pareja"]["id"]))
+            elif tipo == "add_partidos":
+                tocados.update(("partido", p["id"]) for p in operacion["partidos"] if p["ganador_id"])
+            elif tipo == "set_resultado":
+                tocados.add(("partido", operacion["partido_id"]))
+            elif tipo not in ("set_contadores", "set_meta", "update_partidos"):
+                return None
+        ratings = dict(self.ratings)
+        ultimo = dict(self.ultimo)
+        partidos = []
+        for tipo, elemento_id in tocados:
+            if tipo == "pareja":
+                ratings.setdefault(elemento_id, ELO_INICIAL)
+                continue
+            antes = anterior.partido(elemento_id)
+            if antes is not None and antes["ganador_id"]:
+                return None
+            despues = nuevo.partido(elemento_id)
+            if despues is not None and despues["ganador_id"]:
+                partidos.append(despues)
+        for partido in sorted(partidos, key=self._orden):
+            clave = self._orden(partido)
+            pareja1_id, pareja2_id = partido["pareja1_id"], partido["pareja2_id"]
+            if pareja1_id not in ratings or pareja2_id not in ratings or \
+                    partido["ganador_id"] not in (pareja1_id, pareja2_id):
+                continue
+            if ultimo.get(pareja1_id, (-1,)) > clave or ultimo.get(pareja2_id, (-1,)) > clave:
+                return None
+            ganador_id = partido["ganador_id"]
+            perdedor_id = pareja2_id if ganador_id == pareja1_id else pareja1_id
+            delta = self._delta(ratings[ganador_id], ratings[perdedor_id])
+            ratings[ganador_id] += delta
+            ratings[perdedor_id] -= delta
+            ultimo[pareja1_id] = ultimo[pareja2_id] = clave
+        return EloRatings(ratings, ultimo)
+
+
+# Resumen del torneo para la portada: contadores, primeros partidos pendientes y fecha de la última modificación.
+# derive() lo actualiza a partir de las operaciones de cada commit mirando solo los partidos que tocan, de modo
+# que leerlo no recorre la lista de partidos. completo indica que proximos contiene todos los pendientes.
+class TournamentSummary:
+    def __init__(self, torneo, completados, proximos, completo):
+        self.datos = torneo
+        self.version = torneo.get("version", 0)
+        self.actualizado = torneo.get("actualizado")
+        self.parejas = len(torneo["parejas"])
+        self.partidos = len(torneo["partidos"])
+        self.completados = completados
+        self.pendientes = self.partidos - completados
+        self.proximos = proximos
+        self.completo = completo
+
+    @classmethod
+    def from_tournament(cls, torneo):
+        completados = 0
+        proximos = []
+        for partido in torneo["partidos"]:
+            if partido["ganador_id"]:
+                completados += 1
+            elif len(proximos) < SUMMARY_NEXT_PENDING:
+                proximos.append(partido)
+        return cls(torneo, completados, proximos, len(proximos) < SUMMARY_NEXT_PENDING)
+
+    def pareja(self, pareja_id):
+        return _find_by_id(self.datos["parejas"], pareja_id)
+
+    def derive(self, torneo, operaciones):
+        # None si alguna operación obliga a recalcular desde cero (bajas de parejas, reinicio)
+        tocados = set()
+        for operacion in operaciones:
+            tipo = operacion["op"]
+            if tipo == "add_partidos":
+                tocados.update(partido["id"] for partido in operacion["partidos"])
+            elif tipo == "set_resultado":
+                tocados.add(operacion["partido_id"])
+            elif tipo == "update_partidos":
+                tocados.update(partido_id for partido_id, _ in operacion["cambios"])
+            elif tipo not in ("add_pareja", "set_contadores", "set_meta"):
+                return None
+        completados = self.completados
+        for partido_id in tocados:
+            anterior = _find_by_id(self.datos["partidos"], partido_id)
+            nuevo = _find_by_id(torneo["partidos"], partido_id)
+            completados += bool(nuevo and nuevo["ganador_id"]) - bool(anterior and anterior["ganador_id"])
+        # Los pendientes nuevos solo pueden estar entre los tocados. Si la cola no tenía todos los pendientes,
+        # solo es fiable hasta su último id: por encima se rellena recorriendo los partidos desde ahí.
+        proximos = []
+        for partido_id in sorted(tocados.union(p["id"] for p in self.proximos)):
+            partido = _find_by_id(torneo["partidos"], partido_id)
+            if partido is not None and not partido["ganador_id"]:
+                proximos.append(partido)
+        if self.completo:
+            completo = len(proximos) <= SUMMARY_NEXT_PENDING
+        else:
+            ultimo = self.proximos[-1]["id"]
+            proximos = [p for p in proximos if p["id"] <= ultimo]
+            completo = False
+            if len(proximos) < SUMMARY_NEXT_PENDING:
+                completo = True
+                for partido in torneo["partidos"][bisect.bisect_right(torneo["partidos"], ultimo,
+                                                                      key=lambda p: p["id"]):]:
+                    if not partido["ganador_id"]:
+                        proximos.append(partido)
+                        if len(proximos) == SUMMARY_NEXT_PENDING:
+                            completo = False
+                            break
+        proximos = proximos[:SUMMARY_NEXT_PENDING]
+        return TournamentSummary(torneo, completados, proximos, completo)
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_name(nombre):
+    # Clave de un jugador: sin tildes, sin distinguir mayúsculas y con los espacios normalizados
+    sin_tildes = "".join(c for c in unicodedata.normalize("NFKD", nombre) if not unicodedata.combining(c))
+    return " ".join(sin_tildes.casefold().split())
+
+
+# Registro de jugadores por nombre normalizado: jugador -> parejas -> partidos. Las estadísticas suman las de
+# todas sus parejas (según los partidos, no los contadores guardados) y las del histórico de jugadores, que
+# conserva los resultados de los partidos que ya no están en el torneo (parejas dadas de baja o torneos
+# reiniciados), de modo que el total de un jugador no cambia al cambiar de compañero o de temporada.
+class PlayerRegistry:
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.historico = modelo.datos.get("historial_jugadores") or {}
+        self.jugadores = {}
+        for pareja in modelo.parejas:
+            for nombre in pareja["jugadores"]:
+                jugador = self.jugadores.setdefault(normalize_name(nombre), {"nombre": nombre, "parejas": []})
+                jugador["parejas"].append(pareja["id"])
+        self.claves = sorted(self.jugadores)
+
+    def buscar(self, texto, limite=None):
+        # Claves de los jugadores cuyo nombre contiene el texto, en orden alfabético
+        texto = normalize_name(texto)
+        if not texto:
+            return []
+        encontrados = []
+        for clave in self.claves:
+            if texto in clave:
+                encontrados.append(clave)
+                if limite is not None and len(encontrados) == limite:
+                    break
+        return encontrados
+
+    def parejas_de(self, clave):
+        return [self.modelo.pareja(pareja_id) for pareja_id in self.jugadores.get(clave, {"parejas": []})["parejas"]]
+
+    def partidos_de(self, clave):
+        jugador = self.jugadores.get(clave)
+        return self.modelo.filtrar_partidos(pareja_ids=jugador["parejas"]) if jugador else []
+
+    def estadisticas(self, clave):
+        jugador = self.jugadores.get(clave)
+        historico = self.historico.get(clave, {})
+        victorias = derrotas = 0
+        companeros = []
+        for pareja in self.parejas_de(clave):
+            v, d = self.modelo.clasificacion.estadisticas[pareja["id"]]
+            victorias += v
+            derrotas += d
+            companeros.extend(n for n in pareja["jugadores"] if normalize_name(n) != clave)
+        return {
+            "jugador": jugador["nombre"] if jugador else historico.get("nombre", clave),
+            "companeros": companeros,
+            "victorias": victorias,
+            "derrotas": derrotas,
+            "victorias_total": victorias + historico.get("victorias", 0),
+            "derrotas_total": derrotas + historico.get("derrotas", 0)
+        }
+
+    def archivar(self, partidos):
+        # Histórico de jugadores con los resultados de estos partidos añadidos, para guardarlo antes de borrarlos
+        historico = {clave: dict(datos) for clave, datos in self.historico.items()}
+        for partido in partidos:
+            ganador_id = partido["ganador_id"]
+            if not ganador_id:
+                continue
+            perdedor_id = partido["pareja2_id"] if ganador_id == partido["pareja1_id"] else partido["pareja1_id"]
+            for pareja_id, campo in ((ganador_id, "victorias"), (perdedor_id, "derrotas")):
+                pareja = self.modelo.pareja(pareja_id)
+                for nombre in pareja["jugadores"] if pareja else []:
+                    datos = historico.setdefault(normalize_name(nombre),
+                                                 {"nombre": nombre, "victorias": 0, "derrotas": 0})
+                    datos[campo] += 1
+        return historico
+
+
+# Modelo del torneo: índices por id construidos una sola vez por snapshot, para que cada consulta sea O(1)
+class TournamentModel:
+    def __init__(self, torneo, clasificacion=None, elo=None):
+        self.datos = torneo
+        self._clasificacion = clasificacion
+        self._elo = elo
+        self._clasificacion_grupos = None
+        self._historiales = {}
+        self._jugadores = None
+        self.version = torneo.get("version", 0)
+        self.parejas = torneo["parejas"]
+        self.partidos = torneo["partidos"]
+        self.pareja_por_id = {}
+        self.pareja_por_jugador = {}
+        self.partidos_por_pareja = {}
+        self.max_pareja_id = 0
+        for pareja in self.parejas:
+            self.max_pareja_id = max(self.max_pareja_id, pareja["id"])
+            self.pareja_por_id[pareja["id"]] = pareja
+            self.partidos_por_pareja[pareja["id"]] = []
+            for jugador in pareja["jugadores"]:
+                self.pareja_por_jugador[normalize_name(jugador)] = pareja
+        self.partido_por_id = {}
+        self.partidos_pendientes = []
+        self.partidos_completados = []
+        self.enfrentamientos = set()
+        self.max_partido_id = 0
+        for partido in self.partidos:
+            pareja1_id = partido["pareja1_id"]
+            pareja2_id = partido["pareja2_id"]
+            self.max_partido_id = max(self.max_partido_id, partido["id"])
+            self.partido_por_id[partido["id"]] = partido
+            self.partidos_por_pareja.setdefault(pareja1_id, []).append(partido)
+            self.partidos_por_pareja.setdefault(pareja2_id, []).append(partido)
+            self.enfrentamientos.add((min(pareja1_id, pareja2_id), max(pareja1_id, pareja2_id)))
+            if partido["ganador_id"]:
+                self.partidos_completados.append(partido)
+            else:
+                self.partidos_pendientes.append(partido)
+
+    def pareja(self, pareja_id):
+        return self.pareja_por_id.get(pareja_id)
+
+    def partido(self, partido_id):
+        return self.partido_por_id.get(partido_id)
+
+    def partidos_de(self, pareja_id):
+        return self.partidos_por_pareja.get(pareja_id, [])
+
+    def filtrar_partidos(self, completados=None, pareja_ids=None):
+        # Partidos que cumplen los filtros en el orden de alta, sin recorrer todo el torneo si hay pareja
+        if pareja_ids is None:
+            if completados is None:
+                return self.partidos
+            return self.partidos_completados if completados else self.partidos_pendientes
+        vistos = {}
+        for pareja_id in pareja_ids:
+            for partido in self.partidos_de(pareja_id):
+                if completados is None or bool(partido["ganador_id"]) == completados:
+                    vistos[partido["id"]] = partido
+        return sorted(vistos.values(), key=lambda p: p["id"])
+
+    def han_jugado(self, pareja1_id, pareja2_id):
+        return (min(pareja1_id, pareja2_id), max(pareja1_id, pareja2_id)) in self.enfrentamientos
+
+    def clasificacion_grupos(self):
+        # [(grupo, filas)] de la fase de grupos, calculado una vez por snapshot
+        if self._clasificacion_grupos is None:
+            formato = self.datos.get("formato") or {}
+            self._clasificacion_grupos = []
+            for nombre, grupo in zip(group_names(len(formato.get("grupos", []))), formato.get("grupos", [])):
+                parejas = [self.pareja_por_id[p] for p in grupo if p in self.pareja_por_id]
+                partidos = [p for p in self.partidos if p.get("grupo") == nombre]
+                filas = Standings.from_tournament(parejas, partidos).filas(self.pareja_por_id)
+                self._clasificacion_grupos.append((nombre, filas))
+        return self._clasificacion_grupos
+
+    def historial(self, clave="fecha"):
+        # StandingsHistory por "fecha" o "jornada", construido la primera vez que se consulta en este snapshot
+        if clave not in self._historiales:
+            self._historiales[clave] = StandingsHistory(self.parejas, self.partidos, clave)
+        return self._historiales[clave]
+
+    @property
+    def jugadores(self):
+        if self._jugadores is None:
+            self._jugadores = PlayerRegistry(self)
+        return self._jugadores
+
+    @property
+    def elo(self):
+        if self._elo is None:
+            self._elo = EloRatings.from_tournament(self.parejas, self.partidos)
+        return self._elo
+
+    @property
+    def clasificacion(self):
+        if self._clasificacion is None:
+            self._clasificacion = Standings.from_tournament(self.parejas, self.partidos)
+        return self._clasificacion
+
+    def derive(self, torneo, operaciones):
+        # Modelo del snapshot resultante de aplicar operaciones, reutilizando la clasificación y el Elo ya calculados
+        if self._clasificacion is None and self._elo is None:
+            return None
+        clasificacion = self._clasificacion.derive(operaciones) if self._clasificacion is not None else None
+        modelo = TournamentModel(torneo, clasificacion)
+        if self._elo is not None:
+            modelo._elo = self._elo.derive(self, modelo, operaciones)
+        return modelo
+
+
+# Almacenamiento del torneo.
+# Cada backend mantiene un snapshot compartido por todas las sesiones del proceso que se trata como inmutable;
+# solo se vuelve a leer del disco cuando cambia su firma. torneo["version"] se incrementa en cada commit y
+# permite el control de concurrencia optimista: un commit solo se confirma si la versión leída sigue vigente.
+class VersionConflict(Exception):
+    pass
+
+
+# Un commit que no ha llegado al disco: mutate_tournament lo devuelve como (False, mensaje)
+class StorageError(Exception):
+    pass
+
+
+class TournamentStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._firma = None
+        self._torneo = None
+        self._modelo = None
+        self._resumen = None
+
+    def _publish(self, torneo, firma, base=None, operaciones=None):
+        # Con base y operaciones el nuevo snapshot deriva del anterior y su modelo y su resumen se actualizan
+        # incrementalmente
+        modelo = None
+        resumen = None
+        if operaciones:
+            anterior = self._modelo
+            if anterior is not None and anterior.datos is base:
+                modelo = anterior.derive(torneo, operaciones)
+            anterior = self._resumen
+            if anterior is not None and anterior.datos is base:
+                resumen = anterior.derive(torneo, operaciones)
+        with self._lock:
+            self._firma = firma
+            self._torneo = torneo
+            if modelo is not None:
+                self._modelo = modelo
+            if resumen is not None:
+                self._resumen = resumen
+
+    def load(self):
+        raise NotImplementedError
+
+    def _commit(self, operaciones, version):
+        raise NotImplementedError
+
+    def commit(self, operaciones, version=None):
+        # Cada commit deja la hora de la última modificación, que el resumen muestra sin mirar los partidos
+        operaciones = list(operaciones) + [{"op": "set_meta", "clave": "actualizado",
+                                            "valor": datetime.now().isoformat(timespec="seconds")}]
+        if version is not None:
+            return self._commit(operaciones, version)
+        # Sin versión esperada las operaciones se reaplican sobre la versión más reciente
+        for intento in range(MAX_COMMIT_RETRIES):
+            try:
+                return self._commit(operaciones, self.load().get("version", 0))
+            except VersionConflict:
+                _backoff(intento)
+        raise VersionConflict("Demasiados cambios simultáneos, inténtalo de nuevo")
+
+    def compact(self):
+        return False
+
+    def model(self):
+        torneo = self.load()
+        modelo = self._modelo
+        if modelo is None or modelo.datos is not torneo:
+            modelo = TournamentModel(torneo)
+            with self._lock:
+                if self._torneo is torneo:
+                    self._modelo = modelo
+        return modelo
+
+    def summary(self):
+        torneo = self.load()
+        resumen = self._resumen
+        if resumen is None or resumen.datos is not torneo:
+            resumen = TournamentSummary.from_tournament(torneo)
+            with self._lock:
+                if self._torneo is torneo:
+                    self._resumen = resumen
+        return resumen
+
+
+class JsonStore(TournamentStore):
+    # Con journal_filename cada mutación se añade como una línea al diario y se compacta periódicamente en filename
+    # Con diferido (solo sin diario) el commit publica el snapshot en memoria y lo escribe un WriteBehind
+    def __init__(self, filename, journal_filename=None, compact_every=200, diferido=False):
+        super().__init__()
+        self.filename = filename
+        self.journal_filename = journal_filename
+        self.compact_every = compact_every
+        self.journal_offset = 0
+        self.journal_records = 0
+        self.escritor = None
+        if diferido and journal_filename is None:
+            self.escritor = get_writer(filename, self._escrito)
+
+    def _escrito(self, torneo):
+        # El fichero ya contiene el snapshot vigente: su firma vuelve a validar la caché
+        with self._lock:
+            if self._torneo is torneo:
+                self._firma = self._signature()
+
+    def _signature(self):
+        if self.journal_filename is None:
+            return file_signature(self.filename)
+        return file_signature(self.filename), file_signature(self.journal_filename)
+
+    def _publish_journal(self, torneo, firma, journal_offset, journal_records, base=None, operaciones=None):
+        with self._lock:
+            self.journal_offset = journal_offset
+            self.journal_records = journal_records
+        self._publish(torneo, firma, base, operaciones)
+
+    def load(self):
+        if self.journal_filename is not None:
+            return self._load_journal()
+        firma = self._signature()
+        with self._lock:
+            if firma is not None and firma == self._firma:
+                return self._torneo
+            if self.escritor is not None and self._torneo is not None and self.escritor.dirty():
+                # Hay cambios aún sin escribir: el snapshot en memoria es el vigente
+                return self._torneo
+        if self.escritor is not None and self.escritor.dirty():
+            # Almacenamiento recién creado con cambios de otro en la cola: se escriben antes de leer
+            self.escritor.flush()
+            firma = self._signature()
+        torneo = load_json(self.filename, {"parejas": [], "partidos": []})
+        # Si el fichero cambia entre el stat y la lectura, la firma antigua fuerza una recarga en la siguiente llamada
+        self._publish(torneo, firma if firma is not None else self._signature())
+        return torneo
+
+    def _read_journal(self, torneo, offset=0, aplicadas=None):
+        registros = 0
+        try:
+            with timed("read_journal"), open(self.journal_filename, "rb") as f:
+                f.seek(offset)
+                datos = f.read()
+        except FileNotFoundError:
+            return offset, registros
+        record_io(leidos=len(datos))
+        # Una línea final sin salto es una escritura a medias: se ignora y el siguiente commit la descarta
+        completo = datos[:datos.rfind(b"\n") + 1]
+        for linea in completo.splitlines():
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                # Diarios escritos antes de descartar los restos: la línea dañada no tiene arreglo y se salta
+                logging.getLogger("torneo").warning(f"Registro no válido en {self.journal_filename}, se ignora")
+                continue
+            record_io(parseos=1)
+            registros += 1
+            if registro["version"] <= torneo.get("version", 0):
+                continue
+            for operacion in registro["ops"]:
+                apply_operation(torneo, operacion)
+            if aplicadas is not None:
+                aplicadas.extend(registro["ops"])
+            torneo["version"] = registro["version"]
+        return offset + len(completo), registros
+
+    def _load_journal(self):
+        firma = self._signature()
+        with self._lock:
+            if firma[0] is not None and firma == self._firma:
+                return self._torneo
+            anterior = self._firma
+            torneo = self._torneo
+            offset = self.journal_offset
+            registros = self.journal_records
+        if anterior is not None and firma[0] == anterior[0] and firma[1] is not None and firma[1][1] > offset:
+            # Solo ha crecido el diario: se aplican los registros nuevos sobre el snapshot actual
+            base = torneo
+            aplicadas = []
+            torneo = _copy_tournament(base)
+            offset, nuevos = self._read_journal(torneo, offset, aplicadas)
+            self._publish_journal(torneo, firma, offset, registros + nuevos, base, aplicadas)
+            return torneo
+        torneo = load_json(self.filename, {"parejas": [], "partidos": []})
+        offset, registros = self._read_journal(torneo)
+        self._publish_journal(torneo, firma, offset, registros)
+        return torneo
+
+    def _commit(self, operaciones, version):
+        if self.journal_filename is not None:
+            return self._commit_journal(operaciones, version)
+        base = self.load()
+        if base.get("version", 0) != version:
+            raise VersionConflict(f"El torneo ha cambiado (versión {base.get('version', 0)}, se esperaba {version})")
+        torneo = _copy_tournament(base)
+        for operacion in operaciones:
+            apply_operation(torneo, operacion)
+        torneo["version"] = version + 1
+        if self.escritor is not None:
+            with self._write_lock:
+                if self.load().get("version", 0) != version:
+                    raise VersionConflict("El torneo ha cambiado mientras se guardaba")
+                self._publish(torneo, self._firma, base, operaciones)
+                self.escritor.submit(torneo)
+            return
+        # La serialización se hace fuera del bloqueo; dentro solo se valida la versión y se sustituye el fichero
+        try:
+            temporal = write_json_temp(self.filename, torneo)
+        except Exception as e:
+            raise StorageError(f"Error guardando {self.filename}: {e}") from e
+        with self._write_lock, file_lock(self.filename):
+            if self.load().get("version", 0) != version:
+                os.remove(temporal)
+                raise VersionConflict("El torneo ha cambiado mientras se guardaba")
+            try:
+                os.replace(temporal, self.filename)
+            except OSError as e:
+                os.remove(temporal)
+                raise StorageError(f"Error guardando {self.filename}: {e}") from e
+            self._publish(torneo, self._signature(), base, operaciones)
+
+    def _commit_journal(self, operaciones, version):
+        with self._write_lock, file_lock(self.journal_filename):
+            base = self.load()
+            if base.get("version", 0) != version:
+                raise VersionConflict(f"El torneo ha cambiado (versión {base.get('version', 0)}, "
+                                      f"se esperaba {version})")
+            torneo = _copy_tournament(base)
+            for operacion in operaciones:
+                apply_operation(torneo, operacion)
+            torneo["version"] = version + 1
+            registro = {"version": torneo["version"], "ops": operaciones}
+            try:
+                linea = (json.dumps(registro, ensure_ascii=False) + "\n").encode("utf-8")
+                with timed("append_journal"), open(self.journal_filename, "ab") as f:
+                    # Restos de una escritura interrumpida tras el último registro completo: se descartan para
+                    # no pegar el registro nuevo a una línea a medias
+                    if f.seek(0, os.SEEK_END) > self.journal_offset:
+                        f.truncate(self.journal_offset)
+                    f.write(linea)
+                    f.flush()
+                    os.fsync(f.fileno())
+                record_io(escritos=len(linea))
+            except Exception as e:
+                # El registro se da por no escrito: se quita lo que haya llegado al fichero
+                try:
+                    with open(self.journal_filename, "ab") as f:
+                        f.truncate(self.journal_offset)
+                except OSError:
+                    pass
+                raise StorageError(f"Error guardando {self.journal_filename}: {e}") from e
+            firma = self._signature()
+            registros = self.journal_records + 1
+            self._publish_journal(torneo, firma, firma[1][1], registros, base, operaciones)
+        if registros >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        if self.journal_filename is None:
+            return False
+        with self._write_lock, file_lock(self.journal_filename):
+            torneo = self.load()
+            if not save_json(self.filename, torneo):
+                return False
+            # Si se interrumpe aquí, la versión del fichero compactado evita aplicar dos veces los registros
+            open(self.journal_filename, "w").close()
+            self._publish_journal(torneo, self._signature(), 0, 0)
+        return True
+
+
+class SqliteStore(TournamentStore):
+    # Escrituras por filas en transacciones BEGIN IMMEDIATE sobre una base en modo WAL, segura para varias réplicas.
+    # La fila "version" de meta es la versión del torneo y sirve también de firma barata del snapshot.
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS parejas (
+        id INTEGER PRIMARY KEY,
+        jugadores TEXT NOT NULL,
+        victorias INTEGER NOT NULL DEFAULT 0,
+        derrotas INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS partidos (
+        id INTEGER PRIMARY KEY,
+        pareja1_id INTEGER NOT NULL,
+        pareja2_id INTEGER NOT NULL,
+        ganador_id INTEGER,
+        fecha TEXT,
+        extra TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_partidos_pareja1 ON partidos (pareja1_id);
+    CREATE INDEX IF NOT EXISTS idx_partidos_pareja2 ON partidos (pareja2_id);
+    DROP INDEX IF EXISTS idx_partidos_ganador;
+    CREATE TABLE IF NOT EXISTS meta (
+        clave TEXT PRIMARY KEY,
+        valor TEXT NOT NULL
+    );
+    """
+    PARTIDO_COLUMNS = ("id", "pareja1_id", "pareja2_id", "ganador_id", "fecha")
+
+    def __init__(self, filename, import_from=None):
+        super().__init__()
+        self.filename = filename
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE clave = 'version'").fetchone() is None:
+                conn.execute("INSERT INTO meta (clave, valor) VALUES ('version', '0')")
+                if import_from and os.path.exists(import_from):
+                    self._import(conn, load_json(import_from, {"parejas": [], "partidos": []}))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.filename, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import(self, conn, torneo):
+        for pareja in torneo["parejas"]:
+            self._insert_pareja(conn, pareja)
+        self._insert_partidos(conn, torneo["partidos"])
+        for clave, valor in torneo.items():
+            if clave not in ("parejas", "partidos"):
+                self._set_meta(conn, clave, valor)
+
+    @staticmethod
+    def _insert_pareja(conn, pareja):
+        conn.execute("INSERT INTO parejas (id, jugadores, victorias, derrotas) VALUES (?, ?, ?, ?)",
+                     (pareja["id"], json.dumps(pareja["jugadores"], ensure_ascii=False),
+                      pareja["victorias"], pareja["derrotas"]))
+
+    def _insert_partidos(self, conn, partidos):
+        filas = []
+        for partido in partidos:
+            extra = {k: v for k, v in partido.items() if k not in self.PARTIDO_COLUMNS}
+            filas.append(tuple(partido.get(c) for c in self.PARTIDO_COLUMNS)
+                         + (json.dumps(extra, ensure_ascii=False) if extra else None,))
+        conn.executemany("INSERT INTO partidos (id, pareja1_id, pareja2_id, ganador_id, fecha, extra) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", filas)
+
+    @staticmethod
+    def _set_meta(conn, clave, valor):
+        conn.execute("INSERT INTO meta (clave, valor) VALUES (?, ?) "
+                     "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor",
+                     (clave, json.dumps(valor, ensure_ascii=False)))
+
+    @staticmethod
+    def _row_to_pareja(fila):
+        return {"id": fila[0], "jugadores": json.loads(fila[1]), "victorias": fila[2], "derrotas": fila[3]}
+
+    def _row_to_partido(self, fila):
+        partido = dict(zip(self.PARTIDO_COLUMNS, fila[:5]))
+        if fila[5]:
+            partido.update(json.loads(fila[5]))
+        return partido
+
+    def _select_partidos(self):
+        filas = self._conn().execute(
+            "SELECT id, pareja1_id, pareja2_id, ganador_id, fecha, extra FROM partidos ORDER BY id")
+        return [self._row_to_partido(f) for f in filas]
+
+    def _signature(self):
+        return int(self._conn().execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0])
+
+    def load(self):
+        firma = self._signature()
+        with self._lock:
+            if firma == self._firma:
+                return self._torneo
+        conn = self._conn()
+        # Lectura consistente de las tres tablas dentro de una misma transacción
+        conn.execute("BEGIN")
+        try:
+            with timed("sqlite_load"):
+                firma = self._signature()
+                torneo = {clave: json.loads(valor) for clave, valor
+                          in conn.execute("SELECT clave, valor FROM meta WHERE clave != 'version'")}
+                torneo["parejas"] = [self._row_to_pareja(f) for f in conn.execute(
+                    "SELECT id, jugadores, victorias, derrotas FROM parejas ORDER BY id")]
+                torneo["partidos"] = self._select_partidos()
+                torneo["version"] = firma
+        finally:
+            conn.execute("COMMIT")
+        self._publish(torneo, firma)
+        return torneo
+
+    def _commit(self, operaciones, version):
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                actual = self._signature()
+                if actual != version:
+                    raise VersionConflict(f"El torneo ha cambiado (versión {actual}, se esperaba {version})")
+                for operacion in operaciones:
+                    self._apply_sql(conn, operacion)
+                conn.execute("UPDATE meta SET valor = CAST(valor AS INTEGER) + 1 WHERE clave = 'version'")
+                conn.execute("COMMIT")
+            except Exception as e:
+                conn.execute("ROLLBACK")
+                if isinstance(e, sqlite3.Error):
+                    raise StorageError(f"Error guardando {self.filename}: {e}") from e
+                raise
+            with self._lock:
+                base = self._torneo if self._firma == version else None
+            # Si el snapshot estaba al día se actualiza en memoria sin releer las tablas
+            if base is not None:
+                torneo = _copy_tournament(base)
+                for operacion in operaciones:
+                    apply_operation(torneo, operacion)
+                torneo["version"] = version + 1
+                self._publish(torneo, version + 1, base, operaciones)
+
+    def _apply_sql(self, conn, operacion):
+        tipo = operacion["op"]
+        if tipo == "add_pareja":
+            self._insert_pareja(conn, operacion["pareja"])
+        elif tipo == "remove_pareja":
+            pareja_id = operacion["pareja_id"]
+            conn.execute("DELETE FROM partidos WHERE pareja1_id = ? OR pareja2_id = ?", (pareja_id, pareja_id))
+            conn.execute("DELETE FROM parejas WHERE id = ?", (pareja_id,))
+        elif tipo == "add_partidos":
+            self._insert_partidos(conn, operacion["partidos"])
+        elif tipo == "set_resultado":
+            fila = conn.execute("SELECT pareja1_id, pareja2_id, ganador_id FROM partidos WHERE id = ?",
+                                (operacion["partido_id"],)).fetchone()
+            if fila is None:
+                return
+            pareja1_id, pareja2_id, ganador_anterior = fila
+            ganador_id = operacion["ganador_id"]
+            for ganador, delta in ((ganador_anterior, -1), (ganador_id, 1)):
+                if ganador:
+                    perdedor = pareja2_id if ganador == pareja1_id else pareja1_id
+                    conn.execute("UPDATE parejas SET victorias = victorias + ? WHERE id = ?", (delta, ganador))
+                    conn.execute("UPDATE parejas SET derrotas = derrotas + ? WHERE id = ?", (delta, perdedor))
+            conn.execute("UPDATE partidos SET ganador_id = ? WHERE id = ?", (ganador_id, operacion["partido_id"]))
+        elif tipo == "update_partidos":
+            for partido_id, campos in operacion["cambios"]:
+                fila = conn.execute("SELECT extra FROM partidos WHERE id = ?", (partido_id,)).fetchone()
+                if fila is None:
+                    continue
+                extra = dict(json.loads(fila[0]) if fila[0] else {}, **campos)
+                conn.execute("UPDATE partidos SET extra = ? WHERE id = ?",
+                             (json.dumps(extra, ensure_ascii=False), partido_id))
+        elif tipo == "set_meta":
+            self._set_meta(conn, operacion["clave"], operacion["valor"])
+        elif tipo == "set_contadores":
+            conn.executemany("UPDATE parejas SET victorias = ?, derrotas = ? WHERE id = ?",
+                             [(victorias, derrotas, pareja_id)
+                              for pareja_id, victorias, derrotas in operacion["contadores"]])
+        elif tipo == "reset":
+            conn.execute("DELETE FROM partidos")
+            conn.execute("DELETE FROM parejas")
+            conn.execute("DELETE FROM meta WHERE clave != 'version'")
+        else:
+            raise ValueError(f"Operación desconocida: {tipo}")
+
+
+# Un único almacenamiento por proceso, compartido por todas las sesiones (y reruns) que importan el módulo
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            if STORAGE_MODE == "sqlite":
+                _store = SqliteStore(TORNEO_DB_FILE, import_from=TORNEO_FILE)
+            elif STORAGE_MODE == "journal":
+                _store = JsonStore(TORNEO_FILE, TORNEO_JOURNAL_FILE, JOURNAL_COMPACT_EVERY)
+            else:
+                _store = JsonStore(TORNEO_FILE, diferido=DURABILITY == "deferred")
+        return _store
+
+
+def get_tournament_version():
+    return initialize_tournament().get("version", 0)
+
+
+# Torneo
+def initialize_tournament():
+    return get_store().load()
+
+
+def commit_operations(operaciones, version=None):
+    get_store().commit(operaciones, version)
+
+
+def _backoff(intento):
+    time.sleep(random.uniform(0, COMMIT_BACKOFF_SECONDS * 2 ** intento))
+
+
+def mutate_tournament(preparar):
+    # preparar(modelo) -> (resultado, operaciones). Se vuelve a preparar sobre la versión nueva si otro
+    # usuario confirma un cambio antes, de modo que las validaciones siempre ven el estado vigente.
+    for intento in range(MAX_COMMIT_RETRIES):
+        modelo = get_tournament_model()
+        resultado, operaciones = preparar(modelo)
+        if not operaciones:
+            return resultado
+        try:
+            commit_operations(operaciones, modelo.version)
+            return resultado
+        except VersionConflict:
+            _backoff(intento)
+        except StorageError as e:
+            return False, str(e)
+    return False, "Demasiados cambios simultáneos, inténtalo de nuevo"
+
+
+def compact_journal():
+    return get_store().compact()
+
+
+def get_tournament_model():
+    return get_store().model()
+
+
+def get_tournament_summary():
+    return get_store().summary()
+
+
+def add_pareja(jugador1, jugador2):
+    def preparar(modelo):
+        clave1, clave2 = normalize_name(jugador1), normalize_name(jugador2)
+        if clave1 == clave2:
+            return (False, "Los jugadores deben ser diferentes"), []
+        if clave1 in modelo.pareja_por_jugador or clave2 in modelo.pareja_por_jugador:
+            return (False, "Uno de los jugadores ya está en otra pareja"), []
+        nueva_pareja = {
+            "id": modelo.max_pareja_id + 1,
+            "jugadores": [jugador1, jugador2],
+            "victorias": 0,
+            "derrotas": 0
+        }
+        return (True, "Pareja añadida correctamente"), [{"op": "add_pareja", "pareja": nueva_pareja}]
+
+    return mutate_tournament(preparar)
+
+
+def remove_pareja(pareja_id):
+    # Los partidos de la pareja se borran con ella; sus resultados pasan al histórico de jugadores
+    def preparar(modelo):
+        if modelo.pareja(pareja_id) is None:
+            return (False, "La pareja no existe"), []
+        operaciones = [{"op": "remove_pareja", "pareja_id": pareja_id}]
+        # Los rivales pierden las victorias y derrotas de los partidos borrados, igual que la clasificación
+        contadores = {}
+        for partido in modelo.partidos_de(pareja_id):
+            rival_id = partido["pareja2_id"] if partido["pareja1_id"] == pareja_id else partido["pareja1_id"]
+            rival = modelo.pareja(rival_id)
+            if not partido["ganador_id"] or rival is None:
+                continue
+            victorias, derrotas = contadores.get(rival_id, (rival["victorias"], rival["derrotas"]))
+            if partido["ganador_id"] == rival_id:
+                victorias -= 1
+            else:
+                derrotas -= 1
+            contadores[rival_id] = (victorias, derrotas)
+        if contadores:
+            operaciones.append({"op": "set_contadores", "contadores": [
+                [rival_id, victorias, derrotas] for rival_id, (victorias, derrotas) in contadores.items()]})
+        if any(partido["ganador_id"] for partido in modelo.partidos_de(pareja_id)):
+            operaciones.append({"op": "set_meta", "clave": "historial_jugadores",
+                                "valor": modelo.jugadores.archivar(modelo.partidos_de(pareja_id))})
+        return (True, "Pareja eliminada"), operaciones
+
+    return mutate_tournament(preparar)
+
+
+# Importación masiva desde CSV o JSONL. Cada fila es una pareja (jugador1, jugador2) o un resultado histórico
+# (pareja1, pareja2, ganador y fecha opcionales), donde cada pareja se indica por el nombre de uno de sus
+# jugadores. Las filas se leen en streaming, las erróneas se informan por número de línea y todo lo válido se
+# guarda en un único commit.
+IMPORT_FIELDS = ("jugador1", "jugador2", "pareja1", "pareja2", "ganador", "fecha")
+
+
+def read_import_rows(fichero, nombre):
+    # (línea, fila) de un fichero de texto abierto; JSONL si el nombre termina en .jsonl o .json, si no CSV
+    if nombre.lower().endswith((".jsonl", ".json")):
+        for linea, texto in enumerate(fichero, 1):
+            if not texto.strip():
+                continue
+            try:
+                fila = json.loads(texto)
+            except ValueError:
+                fila = None
+            yield linea, fila if isinstance(fila, dict) else None
+    else:
+        lector = csv.DictReader(fichero)
+        for fila in lector:
+            yield lector.line_num, fila
+
+
+def _parse_import_row(fila):
+    if fila is None:
+        return None, "fila con formato no válido"
+    campos = {clave: str(fila.get(clave) or "").strip() for clave in IMPORT_FIELDS}
+    if campos["jugador1"] or campos["jugador2"]:
+        if not campos["jugador1"] or not campos["jugador2"]:
+            return None, "una pareja necesita jugador1 y jugador2"
+        if normalize_name(campos["jugador1"]) == normalize_name(campos["jugador2"]):
+            return None, "los dos jugadores de la pareja son el mismo"
+        return ("pareja", campos["jugador1"], campos["jugador2"]), None
+    if campos["pareja1"] and campos["pareja2"]:
+        return ("partido", campos["pareja1"], campos["pareja2"], campos["ganador"], campos["fecha"]), None
+    return None, "la fila no es una pareja (jugador1, jugador2) ni un resultado (pareja1, pareja2)"
+
+
+def import_tournament_rows(filas):
+    # filas: iterable de (línea, dict). Devuelve (ok, mensaje, [(línea, error)])
+    registros = []
+    errores_formato = []
+    for linea, fila in filas:
+        registro, error = _parse_import_row(fila)
+        if error:
+            errores_formato.append((linea, error))
+        else:
+            registros.append((linea, registro))
+    errores = []
+
+    def preparar(modelo):
+        errores[:] = errores_formato
+        jugadores = {clave: pareja["id"] for clave, pareja in modelo.pareja_por_jugador.items()}
+        contadores = {}
+        nuevas = []
+        partidos = []
+        siguiente_pareja = modelo.max_pareja_id + 1
+        siguiente_partido = modelo.max_partido_id + 1
+        fecha_importacion = datetime.now().isoformat()
+        for linea, registro in registros:
+            if registro[0] == "pareja":
+                _, jugador1, jugador2 = registro
+                if normalize_name(jugador1) in jugadores or normalize_name(jugador2) in jugadores:
+                    errores.append((linea, "uno de los jugadores ya está en otra pareja"))
+                    continue
+                jugadores[normalize_name(jugador1)] = jugadores[normalize_name(jugador2)] = siguiente_pareja
+                nuevas.append({"id": siguiente_pareja, "jugadores": [jugador1, jugador2],
+                               "victorias": 0, "derrotas": 0})
+                siguiente_pareja += 1
+                continue
+            _, nombre1, nombre2, nombre_ganador, fecha = registro
+            pareja1_id = jugadores.get(normalize_name(nombre1))
+            pareja2_id = jugadores.get(normalize_name(nombre2))
+            if pareja1_id is None or pareja2_id is None:
+                errores.append((linea, f"no hay ninguna pareja con el jugador {nombre2 if pareja1_id else nombre1}"))
+                continue
+            if pareja1_id == pareja2_id:
+                errores.append((linea, "una pareja no puede jugar contra sí misma"))
+                continue
+            ganador_id = jugadores.get(normalize_name(nombre_ganador)) if nombre_ganador else None
+            if nombre_ganador and ganador_id not in (pareja1_id, pareja2_id):
+                errores.append((linea, f"el ganador {nombre_ganador} no juega este partido"))
+                continue
+            partidos.append({"id": siguiente_partido, "pareja1_id": pareja1_id, "pareja2_id": pareja2_id,
+                             "ganador_id": ganador_id, "fecha": fecha or fecha_importacion})
+            siguiente_partido += 1
+            if ganador_id:
+                perdedor_id = pareja2_id if ganador_id == pareja1_id else pareja1_id
+                victorias, derrotas = contadores.get(ganador_id, (0, 0))
+                contadores[ganador_id] = (victorias + 1, derrotas)
+                victorias, derrotas = contadores.get(perdedor_id, (0, 0))
+                contadores[perdedor_id] = (victorias, derrotas + 1)
+        # Los contadores de las parejas nuevas se guardan al darlas de alta; los de las existentes se suman
+        for pareja in nuevas:
+            pareja["victorias"], pareja["derrotas"] = contadores.pop(pareja["id"], (0, 0))
+        operaciones = [{"op": "add_pareja", "pareja": pareja} for pareja in nuevas]
+        if partidos:
+            operaciones.append({"op": "add_partidos", "partidos": partidos})
+        if contadores:
+            operaciones.append({"op": "set_contadores", "contadores": [
+                [pareja_id, modelo.pareja(pareja_id)["victorias"] + victorias,
+                 modelo.pareja(pareja_id)["derrotas"] + derrotas]
+                for pareja_id, (victorias, derrotas) in contadores.items()]})
+        mensaje = f"Importadas {len(nuevas)} parejas y {len(partidos)} partidos"
+        if errores:
+            mensaje += f" ({len(errores)} filas con errores)"
+        return (bool(operaciones), mensaje if operaciones else "No hay filas válidas para importar"), operaciones
+
+    success, message = mutate_tournament(preparar)
+    return success, message, sorted(errores)
+
+
+def import_tournament_file(fichero, nombre):
+    # fichero: binario (subida de Streamlit) o de texto; se decodifica en streaming
+    if not isinstance(fichero, io.TextIOBase):
+        fichero = io.TextIOWrapper(fichero, encoding="utf-8-sig", newline="")
+    return import_tournament_rows(read_import_rows(fichero, nombre))
+
+
+# Calendario de liga por el método del círculo: la primera pareja queda fija y el resto rota una posición por
+# ronda, así cada pareja juega como mucho un partido por jornada y en n-1 rondas se cubren todos los cruces.
+# Con un número impar de parejas se añade un hueco (None) y a quien le toca contra él descansa.
+def round_robin_round(orden, ronda):
+    fija, resto = orden[0], orden[1:]
+    desplazamiento = ronda % len(resto)
+    rotadas = [fija] + resto[len(resto) - desplazamiento:] + resto[:len(resto) - desplazamiento]
+    n = len(rotadas)
+    return [(rotadas[i], rotadas[n - 1 - i]) for i in range(n // 2)]
+
+
+def _prepare_jornada_liga(modelo):
+    parejas = modelo.parejas
+    if len(parejas) < 2:
+        return (False, "Se necesitan al menos 2 parejas para generar una jornada"), []
+    calendario = modelo.datos.get("calendario")
+    ids = sorted(modelo.pareja_por_id)
+    if calendario is None or sorted(p for p in calendario["orden"] if p is not None) != ids:
+        # Nuevo ciclo cuando cambian las parejas inscritas; los cruces ya jugados se saltan
+        calendario = {"orden": ids + [None] if len(ids) % 2 else ids, "ronda": 0,
+                      "jornada": calendario["jornada"] if calendario else 0}
+    orden = calendario["orden"]
+    ronda = calendario["ronda"]
+    while ronda < len(orden) - 1:
+        cruces = round_robin_round(orden, ronda)
+        ronda += 1
+        nuevos = [(p1, p2) for p1, p2 in cruces
+                  if p1 is not None and p2 is not None and not modelo.han_jugado(p1, p2)]
+        if nuevos:
+            break
+    else:
+        return (False, "No hay nuevos enfrentamientos por generar"), []
+    jornada = calendario["jornada"] + 1
+    siguiente_id = modelo.max_partido_id + 1
+    fecha = datetime.now().isoformat()
+    nuevos_partidos = [{
+        "id": siguiente_id + i,
+        "pareja1_id": pareja1_id,
+        "pareja2_id": pareja2_id,
+        "ganador_id": None,
+        "fecha": fecha,
+        "jornada": jornada
+    } for i, (pareja1_id, pareja2_id) in enumerate(nuevos)]
+    jugando = {pareja_id for cruce in nuevos for pareja_id in cruce}
+    descansan = [p for p in orden if p is not None and p not in jugando]
+    mensaje = f"Se generó la jornada {jornada} con {len(nuevos_partidos)} partidos"
+    if descansan:
+        mensaje += " (descansan: " + ", ".join(" & ".join(modelo.pareja(p)["jugadores"]) for p in descansan) + ")"
+    return ((True, mensaje),
+            [{"op": "add_partidos", "partidos": nuevos_partidos},
+             {"op": "set_meta", "clave": "calendario",
+              "valor": {"orden": orden, "ronda": ronda, "jornada": jornada}}])
+
+
+# Sistema suizo: un número fijo de rondas; en cada una se emparejan parejas con balance parecido que no se hayan
+# enfrentado. Se recorre la clasificación de arriba abajo buscando para cada pareja el rival libre más cercano,
+# con vuelta atrás acotada; si no hay emparejamiento sin repetir cruces se acepta el que repite menos.
+def swiss_pairings(orden, han_jugado, max_intentos=SWISS_MAX_BACKTRACKS):
+    intentos = [0]
+
+    def emparejar(libres):
+        if not libres:
+            return []
+        primera = libres[0]
+        for i in range(1, len(libres)):
+            rival = libres[i]
+            if han_jugado(primera, rival):
+                continue
+            intentos[0] += 1
+            if intentos[0] > max_intentos:
+                return None
+            resto = emparejar(libres[1:i] + libres[i + 1:])
+            if resto is not None:
+                return [(primera, rival)] + resto
+        return None
+
+    cruces = emparejar(list(orden))
+    if cruces is not None:
+        return cruces
+    cruces = []
+    libres = list(orden)
+    while libres:
+        primera = libres.pop(0)
+        i = next((i for i, rival in enumerate(libres) if not han_jugado(primera, rival)), 0)
+        cruces.append((primera, libres.pop(i)))
+    return cruces
+
+
+def _prepare_ronda_suiza(modelo, formato):
+    if len(modelo.parejas) < 2:
+        return (False, "Se necesitan al menos 2 parejas para generar una ronda"), []
+    ronda = formato.get("ronda", 0)
+    if ronda >= formato["rondas"]:
+        return (False, f"El sistema suizo ya completó sus {formato['rondas']} rondas"), []
+    if modelo.partidos_pendientes:
+        return (False, f"Faltan {len(modelo.partidos_pendientes)} resultados de la ronda anterior"), []
+    orden = list(modelo.clasificacion.orden)
+    descansos = list(formato.get("descansos", []))
+    descansa = None
+    if len(orden) % 2:
+        # Descansa la pareja peor clasificada que aún no haya descansado
+        descansa = next((p for p in reversed(orden) if p not in descansos), orden[-1])
+        orden.remove(descansa)
+        descansos.append(descansa)
+    cruces = swiss_pairings(orden, modelo.han_jugado)
+    ronda += 1
+    siguiente_id = modelo.max_partido_id + 1
+    fecha = datetime.now().isoformat()
+    nuevos_partidos = [{
+        "id": siguiente_id + i,
+        "pareja1_id": pareja1_id,
+        "pareja2_id": pareja2_id,
+        "ganador_id": None,
+        "fecha": fecha,
+        "jornada": ronda
+    } for i, (pareja1_id, pareja2_id) in enumerate(cruces)]
+    mensaje = f"Se generó la ronda {ronda} de {formato['rondas']} con {len(nuevos_partidos)} partidos"
+    if descansa is not None:
+        mensaje += f" (descansa: {' & '.join(modelo.pareja(descansa)['jugadores'])})"
+    return ((True, mensaje),
+            [{"op": "add_partidos", "partidos": nuevos_partidos},
+             {"op": "set_meta", "clave": "formato", "valor": dict(formato, ronda=ronda, descansos=descansos)}])
+
+
+# Fase de grupos y cuadro eliminatorio: las parejas se reparten en grupos equilibrados (en serpiente según la
+# clasificación si se siembra), cada grupo juega su liga por el método del círculo y las K primeras de cada
+# grupo pasan a un cuadro a eliminación directa. El total de partidos crece linealmente con las parejas.
+def group_names(num_grupos):
+    return [chr(ord("A") + i) for i in range(num_grupos)]
+
+
+def split_groups(orden, num_grupos):
+    grupos = [[] for _ in range(num_grupos)]
+    for i, pareja_id in enumerate(orden):
+        fila, columna = divmod(i, num_grupos)
+        grupos[columna if fila % 2 == 0 else num_grupos - 1 - columna].append(pareja_id)
+    return grupos
+
+
+def bracket_positions(tamano):
+    # Orden de cabezas de serie en el cuadro (1, 8, 4, 5, 2, 7, 3, 6...) para que 1 y 2 solo se crucen en la final
+    posiciones = [1]
+    while len(posiciones) < tamano:
+        n = len(posiciones) * 2
+        posiciones = [x for p in posiciones for x in (p, n + 1 - p)]
+    return posiciones
+
+
+def _nuevos_partidos(modelo, cruces, jornada, **campos):
+    siguiente_id = modelo.max_partido_id + 1
+    fecha = datetime.now().isoformat()
+    return [dict({
+        "id": siguiente_id + i,
+        "pareja1_id": pareja1_id,
+        "pareja2_id": pareja2_id,
+        "ganador_id": None,
+        "fecha": fecha,
+        "jornada": jornada
+    }, **(extra or {}), **campos) for i, (pareja1_id, pareja2_id, extra) in enumerate(cruces)]
+
+
+def _prepare_jornada_grupos(modelo, formato):
+    formato = dict(formato)
+    num_grupos = formato["num_grupos"]
+    if "grupos" not in formato:
+        if len(modelo.parejas) < 2 * num_grupos:
+            return (False, f"Se necesitan al menos {2 * num_grupos} parejas para {num_grupos} grupos"), []
+        if formato.get("sembrado"):
+            orden = list(modelo.clasificacion.orden)
+        else:
+            orden = sorted(modelo.pareja_por_id)
+            random.shuffle(orden)
+        formato["grupos"] = split_groups(orden, num_grupos)
+        formato["calendarios"] = [{"orden": g + [None] if len(g) % 2 else g, "ronda": 0} for g in formato["grupos"]]
+        formato["jornada"] = 0
+    if "cuadro" not in formato:
+        cruces = []
+        calendarios = []
+        for nombre, calendario in zip(group_names(num_grupos), formato["calendarios"]):
+            orden = calendario["orden"]
+            ronda = calendario["ronda"]
+            nuevos = []
+            while not nuevos and ronda < len(orden) - 1:
+                # Las parejas eliminadas después del sorteo quedan como descanso en el calendario
+                nuevos = [(p1, p2, {"grupo": nombre}) for p1, p2 in round_robin_round(orden, ronda)
+                          if p1 in modelo.pareja_por_id and p2 in modelo.pareja_por_id
+                          and not modelo.han_jugado(p1, p2)]
+                ronda += 1
+            cruces.extend(nuevos)
+            calendarios.append({"orden": orden, "ronda": ronda})
+        if cruces:
+            formato["calendarios"] = calendarios
+            formato["jornada"] += 1
+            partidos = _nuevos_partidos(modelo, cruces, formato["jornada"])
+            return ((True, f"Se generó la jornada {formato['jornada']} de la fase de grupos con {len(partidos)} "
+                           f"partidos"),
+                    [{"op": "add_partidos", "partidos": partidos},
+                     {"op": "set_meta", "clave": "formato", "valor": formato}])
+        if modelo.partidos_pendientes:
+            return (False, f"Faltan {len(modelo.partidos_pendientes)} resultados de la fase de grupos"), []
+        formato["cuadro"] = {"rondas": [_seed_bracket(modelo, formato)], "partidos": []}
+    return _prepare_ronda_cuadro(modelo, formato)
+
+
+def _seed_bracket(modelo, formato):
+    posicion_general = {pareja_id: i for i, pareja_id in enumerate(modelo.clasificacion.orden)}
+    clasificados = []
+    for puesto in range(formato["clasifican"]):
+        del_puesto = [filas[puesto]["id"] for _, filas in modelo.clasificacion_grupos() if puesto < len(filas)]
+        clasificados.extend(sorted(del_puesto, key=posicion_general.get))
+    tamano = 1
+    while tamano < len(clasificados):
+        tamano *= 2
+    # Las posiciones sin pareja son descansos para los mejores cabezas de serie
+    return [clasificados[semilla - 1] if semilla <= len(clasificados) else None
+            for semilla in bracket_positions(tamano)]
+
+
+def _prepare_ronda_cuadro(modelo, formato):
+    cuadro = formato["cuadro"]
+    rondas = [list(r) for r in cuadro["rondas"]]
+    partidos_cuadro = [list(p) for p in cuadro["partidos"]]
+    if len(partidos_cuadro) == len(rondas):
+        # La ronda actual ya tiene partidos: se avanza cuando todos tienen ganador
+        ronda = rondas[-1]
+        ganadores = []
+        for i in range(0, len(ronda), 2):
+            partido_id = partidos_cuadro[-1][i // 2]
+            partido = modelo.partido(partido_id) if partido_id is not None else None
+            if partido is None:
+                # Descanso, o partido borrado con una de sus parejas: pasa la que sigue inscrita
+                ganadores.append(_pareja_vigente(modelo, ronda[i]) or _pareja_vigente(modelo, ronda[i + 1]))
+                continue
+            if not partido["ganador_id"]:
+                return (False, "Faltan resultados de la ronda actual del cuadro"), []
+            ganadores.append(partido["ganador_id"])
+        rondas.append(ganadores)
+    while True:
+        # Las parejas eliminadas del torneo dejan su hueco como descanso
+        ronda = rondas[-1] = [_pareja_vigente(modelo, pareja_id) for pareja_id in rondas[-1]]
+        if len(ronda) == 1:
+            # Un único clasificado (formatos guardados antes de exigir dos): es el campeón sin jugar
+            campeon = modelo.pareja(ronda[0])
+            if campeon is None:
+                return (False, "🏆 El cuadro ha terminado sin campeón"), []
+            return (False, f"🏆 El cuadro ha terminado. Campeones: {' & '.join(campeon['jugadores'])}"), []
+        cruces = []
+        ids = []
+        siguiente_id = modelo.max_partido_id + 1
+        for i in range(0, len(ronda), 2):
+            if ronda[i] is None or ronda[i + 1] is None:
+                ids.append(None)
+            else:
+                ids.append(siguiente_id + len(cruces))
+                cruces.append((ronda[i], ronda[i + 1], None))
+        partidos_cuadro.append(ids)
+        if cruces:
+            break
+        # Ronda sin ningún partido: todos pasan por descanso a la siguiente
+        rondas.append([ronda[i] if ronda[i] is not None else ronda[i + 1] for i in range(0, len(ronda), 2)])
+    formato["cuadro"] = {"rondas": rondas, "partidos": partidos_cuadro}
+    formato["jornada"] = formato.get("jornada", 0) + 1
+    nombre_ronda = {2: "la final", 4: "las semifinales", 8: "los cuartos de final"}.get(
+        len(ronda), f"la ronda de {len(ronda)}")
+    partidos = _nuevos_partidos(modelo, cruces, formato["jornada"], fase="eliminatoria",
+                                ronda_cuadro=len(rondas))
+    return ((True, f"Se generaron {len(partidos)} partidos de {nombre_ronda}"),
+            [{"op": "add_partidos", "partidos": partidos},
+             {"op": "set_meta", "clave": "formato", "valor": formato}])
+
+
+def _pareja_vigente(modelo, pareja_id):
+    return pareja_id if pareja_id in modelo.pareja_por_id else None
+
+
+def get_formato():
+    return initialize_tournament().get("formato") or {"tipo": "liga"}
+
+
+def set_formato(formato):
+    if formato["tipo"] == "grupos" and formato["num_grupos"] * formato["clasifican"] < 2:
+        return False, "El cuadro eliminatorio necesita al menos 2 parejas clasificadas"
+
+    def preparar(modelo):
+        return (True, "Formato actualizado"), [{"op": "set_meta", "clave": "formato", "valor": formato}]
+
+    return mutate_tournament(preparar)
+
+
+def generate_jornada():
+    def preparar(modelo):
+        formato = modelo.datos.get("formato") or {"tipo": "liga"}
+        if formato["tipo"] == "suizo":
+            return _prepare_ronda_suiza(modelo, formato)
+        if formato["tipo"] == "grupos":
+            return _prepare_jornada_grupos(modelo, formato)
+        return _prepare_jornada_liga(modelo)
+
+    return mutate_tournament(preparar)
+
+
+# Reparto de partidos pendientes en pistas y horarios. Voraz: los partidos de las parejas más cargadas
+# (más partidos pendientes o más horarios en los que no pueden jugar) se colocan primero en el primer horario
+# libre; después se intenta vaciar el último horario usado moviendo sus partidos a horarios anteriores,
+# desplazando como mucho un partido que estorbe. Ninguna pareja juega dos partidos en el mismo horario.
+def allocate_pistas(partidos, num_pistas, num_horarios, no_disponible=None, mejorar=True):
+    no_disponible = no_disponible or {}
+    carga = {}
+    for partido in partidos:
+        for pareja_id in (partido["pareja1_id"], partido["pareja2_id"]):
+            carga[pareja_id] = carga.get(pareja_id, 0) + 1
+    for pareja_id, horarios in no_disponible.items():
+        carga[pareja_id] = carga.get(pareja_id, 0) + len(horarios)
+    por_horario = [[] for _ in range(num_horarios)]
+    ocupadas = {}
+    horario_de = {}
+
+    def cabe(partido, horario, ignorar=None):
+        en_pista = [p for p in por_horario[horario] if p is not ignorar]
+        if len(en_pista) >= num_pistas:
+            return False
+        for pareja_id in (partido["pareja1_id"], partido["pareja2_id"]):
+            if horario in no_disponible.get(pareja_id, ()):
+                return False
+            if horario in ocupadas.get(pareja_id, ()) and not (
+                    ignorar is not None and pareja_id in (ignorar["pareja1_id"], ignorar["pareja2_id"])):
+                return False
+        return True
+
+    def colocar(partido, horario):
+        por_horario[horario].append(partido)
+        horario_de[partido["id"]] = horario
+        for pareja_id in (partido["pareja1_id"], partido["pareja2_id"]):
+            ocupadas.setdefault(pareja_id, set()).add(horario)
+
+    def quitar(partido):
+        horario = horario_de.pop(partido["id"])
+        por_horario[horario].remove(partido)
+        for pareja_id in (partido["pareja1_id"], partido["pareja2_id"]):
+            ocupadas[pareja_id].discard(horario)
+        return horario
+
+    def primer_hueco(partido, limite, excluir=None):
+        return next((h for h in range(limite) if h != excluir and cabe(partido, h)), None)
+
+    orden = sorted(partidos, key=lambda p: (-(carga[p["pareja1_id"]] + carga[p["pareja2_id"]]),
+                                            p.get("jornada") or 0, p["id"]))
+    sin_asignar = []
+    primero_libre = 0
+    for partido in orden:
+        while primero_libre < num_horarios and len(por_horario[primero_libre]) >= num_pistas:
+            primero_libre += 1
+        horario = next((h for h in range(primero_libre, num_horarios) if cabe(partido, h)), None)
+        if horario is None:
+            sin_asignar.append(partido["id"])
+        else:
+            colocar(partido, horario)
+
+    ultimo = max((h for h in range(num_horarios) if por_horario[h]), default=-1)
+    # Ningún reparto puede terminar antes que esta cota: se deja de mejorar al alcanzarla
+    partidos_por_pareja = {}
+    for partido in partidos:
+        for pareja_id in (partido["pareja1_id"], partido["pareja2_id"]):
+            partidos_por_pareja[pareja_id] = partidos_por_pareja.get(pareja_id, 0) + 1
+    cota = max(-(-len(horario_de) // num_pistas), max(partidos_por_pareja.values(), default=0)) - 1
+    while mejorar and ultimo > max(cota, 0):
+        for partido in list(por_horario[ultimo]):
+            quitar(partido)
+            destino = primer_hueco(partido, ultimo)
+            if destino is not None:
+                colocar(partido, destino)
+                continue
+            # Se prueba a desplazar un partido de un horario anterior que deje sitio a este
+            for horario in range(ultimo):
+                for estorbo in list(por_horario[horario]):
+                    if not cabe(partido, horario, ignorar=estorbo):
+                        continue
+                    quitar(estorbo)
+                    colocar(partido, horario)
+                    nuevo = primer_hueco(estorbo, ultimo, excluir=horario)
+                    if nuevo is not None:
+                        colocar(estorbo, nuevo)
+                        break
+                    quitar(partido)
+                    colocar(estorbo, horario)
+                else:
+                    continue
+                break
+            else:
+                colocar(partido, ultimo)
+        if por_horario[ultimo]:
+            break
+        while ultimo >= 0 and not por_horario[ultimo]:
+            ultimo -= 1
+
+    asignaciones = {}
+    for horario, en_horario in enumerate(por_horario):
+        for pista, partido in enumerate(sorted(en_horario, key=lambda p: p["id"]), start=1):
+            asignaciones[partido["id"]] = (pista, horario)
+    return asignaciones, sin_asignar
+
+
+def schedule_partidos(num_pistas, horarios, no_disponible=None):
+    # horarios: etiquetas ordenadas ("10:00", "10:45"...); no_disponible: pareja_id -> etiquetas en las que no puede
+    indices = {etiqueta: i for i, etiqueta in enumerate(horarios)}
+    no_disponible = {pareja_id: {indices[h] for h in etiquetas if h in indices}
+                     for pareja_id, etiquetas in (no_disponible or {}).items()}
+
+    def preparar(modelo):
+        pendientes = modelo.partidos_pendientes
+        if not pendientes:
+            return (False, "No hay partidos pendientes que programar"), []
+        asignaciones, sin_asignar = allocate_pistas(pendientes, num_pistas, len(horarios), no_disponible)
+        cambios = []
+        for partido in pendientes:
+            pista, horario = asignaciones.get(partido["id"], (None, None))
+            cambios.append([partido["id"], {"pista": pista, "horario": horarios[horario] if pista else None}])
+        usados = {horario for _, horario in asignaciones.values()}
+        mensaje = f"Se programaron {len(asignaciones)} partidos en {len(usados)} horarios"
+        if sin_asignar:
+            mensaje += f"; {len(sin_asignar)} no caben en los horarios disponibles"
+        return (True, mensaje), [{"op": "update_partidos", "cambios": cambios}]
+
+    return mutate_tournament(preparar)
+
+
+# Valor por defecto de ganador_visto: no comprobar qué resultado había antes
+_SIN_COMPROBAR = object()
+
+
+def update_resultado(partido_id, ganador_id, ganador_visto=_SIN_COMPROBAR):
+    # Con ganador_visto, si otro usuario ya guardó un resultado distinto para este partido no se sobrescribe;
+    # los cambios en otros partidos no cuentan como conflicto.
+    def preparar(modelo):
+        partido = modelo.partido(partido_id)
+        if partido is None:
+            return (False, "El partido ya no existe"), []
+        if ganador_id not in (None, partido["pareja1_id"], partido["pareja2_id"]):
+            return (False, f"La pareja {ganador_id} no juega el partido #{partido_id}"), []
+        if partido["ganador_id"] == ganador_id:
+            return (True, "Resultado guardado"), []
+        if ganador_visto is not _SIN_COMPROBAR and partido["ganador_id"] != ganador_visto:
+            return (False, "Otro usuario ha guardado un resultado distinto para este partido"), []
+        return ((True, "Resultado guardado"),
+                [{"op": "set_resultado", "partido_id": partido_id, "ganador_id": ganador_id}])
+
+    return mutate_tournament(preparar)
+
+
+def update_resultados(resultados, vistos=None):
+    # Varios resultados [(partido_id, ganador_id)] en un único commit: se valida todo el lote sobre el mismo
+    # snapshot y la clasificación se recoloca una sola vez. Si algún resultado no es válido no se guarda ninguno.
+    # vistos, opcional, da por partido el ganador que veía el usuario (mismo control que update_resultado).
+    resultados = dict(resultados)
+
+    def preparar(modelo):
+        errores = []
+        operaciones = []
+        for partido_id, ganador_id in resultados.items():
+            partido = modelo.partido(partido_id)
+            if partido is None:
+                errores.append(f"el partido #{partido_id} ya no existe")
+            elif ganador_id not in (None, partido["pareja1_id"], partido["pareja2_id"]):
+                errores.append(f"la pareja {ganador_id} no juega el partido #{partido_id}")
+            elif vistos is not None and partido_id in vistos and partido["ganador_id"] != vistos[partido_id]:
+                errores.append(f"otro usuario ha guardado un resultado distinto para el partido #{partido_id}")
+            elif partido["ganador_id"] != ganador_id:
+                operaciones.append({"op": "set_resultado", "partido_id": partido_id, "ganador_id": ganador_id})
+        if errores:
+            return (False, "No se guardó ningún resultado: " + "; ".join(errores)), []
+        return (True, f"Se guardaron {len(operaciones)} resultados"), operaciones
+
+    return mutate_tournament(preparar)
+
+
+def get_clasificacion():
+    modelo = get_tournament_model()
+    return modelo.clasificacion.filas(modelo.pareja_por_id)
+
+
+def get_clasificacion_historica(valor, clave="fecha"):
+    # Clasificación tras los partidos con fecha (o jornada) <= valor
+    modelo = get_tournament_model()
+    return modelo.historial(clave).as_of(valor).filas(modelo.pareja_por_id)
+
+
+def check_contadores():
+    # Parejas cuyos victorias/derrotas guardados no cuadran con los partidos: (id, guardados, calculados)
+    modelo = get_tournament_model()
+    return modelo.clasificacion.discrepancies(modelo.parejas)
+
+
+def repair_contadores():
+    def preparar(modelo):
+        discrepancias = modelo.clasificacion.discrepancies(modelo.parejas)
+        if not discrepancias:
+            return (True, "Los contadores ya cuadran con los partidos"), []
+        contadores = [[pareja_id, victorias, derrotas] for pareja_id, _, (victorias, derrotas) in discrepancias]
+        return ((True, f"Se corrigieron {len(contadores)} parejas"),
+                [{"op": "set_contadores", "contadores": contadores}])
+
+    return mutate_tournament(preparar)
+
+
+def reset_tournament():
+    # Los resultados del torneo que se borra pasan al histórico de jugadores
+    def preparar(modelo):
+        operaciones = [{"op": "reset"}]
+        historico = modelo.jugadores.archivar(modelo.partidos_completados)
+        if historico:
+            operaciones.append({"op": "set_meta", "clave": "historial_jugadores", "valor": historico})
+        return (True, "Torneo reiniciado"), operaciones
+
+    return mutate_tournament(preparar)
@@ -1,11 +1,31 @@
 import streamlit as st
-import json
-import os
-from itertools import combinations
 import hashlib
+import json
+import logging
+import uuid
 from streamlit_cookies_manager import EncryptedCookieManager
 import pandas as pd
+import altair as alt
 from datetime import datetime
+from torneo_core import (
+    DURABILITY, JOURNAL_COMPACT_EVERY, STORAGE_MODE, TORNEO_DB_FILE, TORNEO_FILE, TORNEO_JOURNAL_FILE, RunStats,
+    add_pareja, check_contadores, compact_journal, flush_writes, generate_jornada, get_clasificacion_historica,
+    get_formato, get_store, get_tournament_model, get_tournament_summary, get_tournament_version,
+    import_tournament_file, initialize_tournament, load_json, measure_run, persist_json, remove_pareja,
+    repair_contadores, reset_tournament, schedule_partidos, set_error_handler, set_formato, timed,
+    update_resultado, update_resultados, write_behind_stats
+)
+
+set_error_handler(st.error)
+
+# Una línea JSON por rerun en stderr (el script se reejecuta en cada rerun: el handler se añade una sola vez)
+rerun_logger = logging.getLogger("torneo.rerun")
+if not rerun_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    rerun_logger.addHandler(_handler)
+    rerun_logger.setLevel(logging.INFO)
+    rerun_logger.propagate = False
 
 # Configuración inicial de la página
 
@@ -222,31 +242,10 @@ if not cookies.ready():
 
 # Archivos de datos
 USUARIOS_FILE = "usuarios.json"
-TORNEO_FILE = "torneo_parejas.json"
-
-
-# Utilidades JSON
-def load_json(filename, default_content=None):
-    if default_content is None:
-        default_content = {}
-    try:
-        if os.path.exists(filename):
-            with open(filename, "r", encoding="utf-8") as f:
-                return json.load(f)
-        else:
-            save_json(filename, default_content)
-            return default_content
-    except Exception as e:
-        st.error(f"Error cargando {filename}: {e}")
-        return default_content
-
-
-def save_json(filename, data):
-    try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        st.error(f"Error guardando {filename}: {e}")
+# Partidos por página en la lista de partidos
+PARTIDOS_POR_PAGINA = 20
+# Cada cuántos segundos las vistas en directo consultan la versión del torneo
+REFRESCO_SEGUNDOS = 5
 
 
 # Autenticación
@@ -262,7 +261,7 @@ def initialize_users():
     users = load_json(USUARIOS_FILE, {})
     if "admin" not in users:
         users["admin"] = hash_password("IMSusana50")  # Contraseña por defecto actualizada
-        save_json(USUARIOS_FILE, users)
+        persist_json(USUARIOS_FILE, users)
     return users
 
 
@@ -290,97 +289,6 @@ def logout_user():
     cookies.save()
 
 
-# Torneo
-def initialize_tournament():
-    return load_json(TORNEO_FILE, {"parejas": [], "partidos": []})
-
-
-def add_pareja(jugador1, jugador2):
-    torneo = initialize_tournament()
-    jugadores_existentes = []
-    for pareja in torneo["parejas"]:
-        jugadores_existentes.extend(pareja["jugadores"])
-    if jugador1 in jugadores_existentes or jugador2 in jugadores_existentes:
-        return False, "Uno de los jugadores ya está en otra pareja"
-    nueva_pareja = {
-        "id": len(torneo["parejas"]) + 1,
-        "jugadores": [jugador1, jugador2],
-        "victorias": 0,
-        "derrotas": 0
-    }
-    torneo["parejas"].append(nueva_pareja)
-    save_json(TORNEO_FILE, torneo)
-    return True, "Pareja añadida correctamente"
-
-
-def remove_pareja(pareja_id):
-    torneo = initialize_tournament()
-    torneo["parejas"] = [p for p in torneo["parejas"] if p["id"] != pareja_id]
-    torneo["partidos"] = [p for p in torneo["partidos"] if
-                          p["pareja1_id"] != pareja_id and p["pareja2_id"] != pareja_id]
-    save_json(TORNEO_FILE, torneo)
-
-
-def generate_jornada():
-    torneo = initialize_tournament()
-    parejas = torneo["parejas"]
-    if len(parejas) < 2:
-        return False, "Se necesitan al menos 2 parejas para generar una jornada"
-    enfrentamientos_hechos = set()
-    for partido in torneo["partidos"]:
-        pareja1_id = partido["pareja1_id"]
-        pareja2_id = partido["pareja2_id"]
-        enfrentamientos_hechos.add((min(pareja1_id, pareja2_id), max(pareja1_id, pareja2_id)))
-    nuevos_partidos = []
-    for pareja1, pareja2 in combinations(parejas, 2):
-        enfrentamiento = (min(pareja1["id"], pareja2["id"]), max(pareja1["id"], pareja2["id"]))
-        if enfrentamiento not in enfrentamientos_hechos:
-            nuevo_partido = {
-                "id": len(torneo["partidos"]) + len(nuevos_partidos) + 1,
-                "pareja1_id": pareja1["id"],
-                "pareja2_id": pareja2["id"],
-                "ganador_id": None,
-                "fecha": datetime.now().isoformat()
-            }
-            nuevos_partidos.append(nuevo_partido)
-    if not nuevos_partidos:
-        return False, "No hay nuevos enfrentamientos por generar"
-    torneo["partidos"].extend(nuevos_partidos)
-    save_json(TORNEO_FILE, torneo)
-    return True, f"Se generaron {len(nuevos_partidos)} nuevos partidos"
-
-
-def update_resultado(partido_id, ganador_id):
-    torneo = initialize_tournament()
-    for partido in torneo["partidos"]:
-        if partido["id"] == partido_id:
-            if partido["ganador_id"]:
-                for pareja in torneo["parejas"]:
-                    if pareja["id"] == partido["ganador_id"]:
-                        pareja["victorias"] -= 1
-                    elif pareja["id"] in [partido["pareja1_id"], partido["pareja2_id"]]:
-                        pareja["derrotas"] -= 1
-            partido["ganador_id"] = ganador_id
-            for pareja in torneo["parejas"]:
-                if pareja["id"] == ganador_id:
-                    pareja["victorias"] += 1
-                elif pareja["id"] in [partido["pareja1_id"], partido["pareja2_id"]]:
-                    pareja["derrotas"] += 1
-            break
-    save_json(TORNEO_FILE, torneo)
-
-
-def get_clasificacion():
-    torneo = initialize_tournament()
-    parejas = torneo["parejas"].copy()
-    parejas.sort(key=lambda x: (-x["victorias"], x["derrotas"]))
-    return parejas
-
-
-def reset_tournament():
-    save_json(TORNEO_FILE, {"parejas": [], "partidos": []})
-
-
 # UI
 def main():
     initialize_users()
@@ -451,77 +359,156 @@ def show_login():
 
 def show_main_app(page):
     st.title("🎾 Pádel 50")
-    if page == "Dashboard":
-        show_dashboard()
-    elif page == "Parejas":
-        show_parejas_management()
-    elif page == "Partidos":
-        show_partidos_management()
-    elif page == "Clasificación":
-        show_clasificacion()
-    elif page == "Configuración":
-        show_configuration()
+    funciones = {
+        "Dashboard": show_dashboard,
+        "Parejas": show_parejas_management,
+        "Partidos": show_partidos_management,
+        "Clasificación": show_clasificacion,
+        "Configuración": show_configuration
+    }
+    if page in funciones:
+        with timed(funciones[page].__name__):
+            funciones[page]()
+
+
+@st.cache_resource
+def get_run_stats():
+    return RunStats()
+
+
+def run_app():
+    # Mide cada rerun completo: se agrega por página para el diagnóstico y se emite una línea de log estructurada
+    st.session_state.reruns = st.session_state.get("reruns", 0) + 1
+    if "sesion_id" not in st.session_state:
+        st.session_state.sesion_id = uuid.uuid4().hex[:8]
+    metricas = None
+    try:
+        with measure_run() as metricas:
+            main()
+    finally:
+        if metricas is not None:
+            pagina = st.session_state.get("page", "Dashboard") if is_authenticated() else "Login"
+            get_run_stats().add(pagina, metricas)
+            rerun_logger.info(json.dumps(dict({
+                "evento": "rerun",
+                "sesion": st.session_state.sesion_id,
+                "rerun": st.session_state.reruns,
+                "pagina": pagina,
+                "usuario": get_current_user() if is_authenticated() else None
+            }, **metricas.as_dict()), ensure_ascii=False))
+
+
+# HTML que solo depende del snapshot del torneo: se genera una vez por versión y lo comparten todas las sesiones,
+# así que repetir la vista cuesta una búsqueda en un diccionario
+class VersionMemo:
+    def __init__(self):
+        self._entradas = {}
+
+    def get(self, nombre, version, calcular):
+        entrada = self._entradas.get(nombre)
+        if entrada is None or entrada[0] != version:
+            entrada = (version, calcular())
+            self._entradas[nombre] = entrada
+        return entrada[1]
+
+
+@st.cache_resource
+def get_render_memo():
+    return VersionMemo()
+
+
+def render_metricas(resumen):
+    tarjetas = [("👥", resumen.parejas, "Parejas"), ("🏆", resumen.partidos, "Partidos"),
+                ("✅", resumen.completados, "Completados"), ("⏳", resumen.pendientes, "Pendientes")]
+    return [f"""
+        <div class="metric-container">
+            <h3>{icono}</h3>
+            <h2>{valor}</h2>
+            <p>{texto}</p>
+        </div>""" for icono, valor, texto in tarjetas]
+
+
+def render_top3(modelo):
+    filas = modelo.clasificacion.filas(modelo.pareja_por_id)[:3]
+    return "".join(f"""
+            <div class="pareja-card">
+                <h4>{medal} {" & ".join(pareja["jugadores"])}</h4>
+                <p>Victorias: {pareja["victorias"]} | Derrotas: {pareja["derrotas"]}</p>
+            </div>""" for medal, pareja in zip(["🥇", "🥈", "🥉"], filas))
+
+
+def render_clasificacion(modelo):
+    # Tabla HTML construida con operaciones por columnas
+    filas = modelo.clasificacion.filas(modelo.pareja_por_id)
+    df = pd.DataFrame({
+        "Pareja": [" & ".join(pareja["jugadores"]) for pareja in filas],
+        "V": [pareja["victorias"] for pareja in filas],
+        "D": [pareja["derrotas"] for pareja in filas],
+        "Elo": [modelo.elo.ratings[pareja["id"]] for pareja in filas]
+    })
+    posicion = pd.Series(range(1, len(df) + 1))
+    jugados = df["V"] + df["D"]
+    porcentaje = (df["V"] / jugados.where(jugados > 0) * 100).fillna(0).round(1)
+    medallas = posicion.map({1: "🥇 ", 2: "🥈 ", 3: "🥉 "}).fillna("")
+    celdas = ("<tr><td>" + medallas + posicion.astype(str) + "</td><td>" + df["Pareja"] + "</td><td>"
+              + jugados.astype(str) + "</td><td>" + df["V"].astype(str) + "</td><td>" + df["D"].astype(str)
+              + "</td><td>" + porcentaje.astype(str) + "%</td><td>" + df["Elo"].round().astype(int).astype(str)
+              + "</td></tr>")
+    cabecera = "".join(f"<th>{columna}</th>" for columna in ["Pos", "Pareja", "PJ", "V", "D", "% Victoria", "Elo"])
+    return (f'<table class="clasificacion-table"><thead><tr>{cabecera}</tr></thead><tbody>'
+            + "".join(celdas) + "</tbody></table>")
+
+
+# Vistas en directo: el fragmento se vuelve a ejecutar solo cada REFRESCO_SEGUNDOS, consulta el sello de versión
+# (un stat del fichero o una consulta a meta) y redibuja desde el HTML memoizado por versión, de modo que los
+# espectadores ven los resultados nuevos sin provocar reruns completos de la app.
+def live_version(vista):
+    version = get_tournament_version()
+    clave = f"version_vista_{vista}"
+    anterior = st.session_state.get(clave)
+    st.session_state[clave] = version
+    if anterior is not None and anterior != version:
+        st.toast("🔄 Hay resultados nuevos")
+    st.caption(f"🟢 En directo · versión {version} · {datetime.now().strftime('%H:%M:%S')}")
 
 
 def show_dashboard():
     st.header("📊 Torneo")
-    torneo = initialize_tournament()
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.markdown(f"""
-        <div class="metric-container">
-            <h3>👥</h3>
-            <h2>{len(torneo['parejas'])}</h2>
-            <p>Parejas</p>
-        </div>""", unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class="metric-container">
-            <h3>🏆</h3>
-            <h2>{len(torneo['partidos'])}</h2>
-            <p>Partidos</p>
-        </div>""", unsafe_allow_html=True)
-    partidos_jugados = len([p for p in torneo["partidos"] if p["ganador_id"]])
-    partidos_pendientes = len([p for p in torneo["partidos"] if not p["ganador_id"]])
-    with col3:
-        st.markdown(f"""
-        <div class="metric-container">
-            <h3>✅</h3>
-            <h2>{partidos_jugados}</h2>
-            <p>Completados</p>
-        </div>""", unsafe_allow_html=True)
-    with col4:
-        st.markdown(f"""
-        <div class="metric-container">
-            <h3>⏳</h3>
-            <h2>{partidos_pendientes}</h2>
-            <p>Pendientes</p>
-        </div>""", unsafe_allow_html=True)
+    show_dashboard_en_directo()
+
+
+@st.fragment(run_every=REFRESCO_SEGUNDOS)
+def show_dashboard_en_directo():
+    live_version("dashboard")
+    # La portada solo lee el resumen: no recorre los partidos ni construye el modelo si la caché está al día
+    resumen = get_tournament_summary()
+    memo = get_render_memo()
+    tarjetas = memo.get("metricas", resumen.version, lambda: render_metricas(resumen))
+    for columna, tarjeta in zip(st.columns(4), tarjetas):
+        with columna:
+            st.markdown(tarjeta, unsafe_allow_html=True)
+    if resumen.actualizado:
+        st.caption(f"🕒 Última modificación: {resumen.actualizado.replace('T', ' ')}")
     st.markdown("---")
-    if torneo["partidos"]:
+    if resumen.partidos:
         st.subheader("⏳ Partidos")
-        partidos_pendientes = [p for p in torneo["partidos"] if not p["ganador_id"]][:3]
+        partidos_pendientes = resumen.proximos[:3]
         if partidos_pendientes:
             for partido in partidos_pendientes:
-                pareja1 = next(p for p in torneo["parejas"] if p["id"] == partido["pareja1_id"])
-                pareja2 = next(p for p in torneo["parejas"] if p["id"] == partido["pareja2_id"])
+                pareja1 = resumen.pareja(partido["pareja1_id"])
+                pareja2 = resumen.pareja(partido["pareja2_id"])
+                pista = f" · Pista {partido['pista']} · {partido['horario']}" if partido.get("pista") else ""
                 st.markdown(f"""
                 <div class="partido-card">
-                    <div class="partido-header">Partido #{partido["id"]}</div>
+                    <div class="partido-header">Partido #{partido["id"]}{pista}</div>
                     <p><strong>{" & ".join(pareja1["jugadores"])}</strong> vs <strong>{" & ".join(pareja2["jugadores"])}</strong></p>
                 </div>""", unsafe_allow_html=True)
         else:
             st.info("🎉 ¡Todos los partidos han sido completados!")
-    if torneo["parejas"]:
+    if resumen.parejas:
         st.subheader("🏆 Top 3 Clasificación")
-        clasificacion = get_clasificacion()[:3]
-        for i, pareja in enumerate(clasificacion):
-            medal = ["🥇", "🥈", "🥉"][i] if i < 3 else "🏅"
-            st.markdown(f"""
-            <div class="pareja-card">
-                <h4>{medal} {" & ".join(pareja["jugadores"])}</h4>
-                <p>Victorias: {pareja["victorias"]} | Derrotas: {pareja["derrotas"]}</p>
-            </div>""", unsafe_allow_html=True)
+        st.markdown(memo.get("top3", resumen.version, lambda: render_top3(get_tournament_model())),
+                    unsafe_allow_html=True)
 
 
 def show_parejas_management():
@@ -548,10 +535,22 @@ def show_parejas_management():
             else:
                 st.error("❌ Por favor, complete ambos nombres")
     st.markdown("---")
-    torneo = initialize_tournament()
-    if torneo["parejas"]:
-        st.subheader(f"📝 Parejas Registradas ({len(torneo['parejas'])})")
-        for pareja in torneo["parejas"]:
+    modelo = get_tournament_model()
+    if modelo.parejas:
+        st.subheader(f"📝 Parejas Registradas ({len(modelo.parejas)})")
+        busqueda = st.text_input("🔍 Buscar jugador", placeholder="Nombre (sin importar tildes ni mayúsculas)",
+                                 key="buscar_jugador")
+        parejas = modelo.parejas
+        if busqueda.strip():
+            registro = modelo.jugadores
+            claves = registro.buscar(busqueda)
+            if claves:
+                show_estadisticas_jugadores(registro, claves)
+            ids = {i for clave in claves for i in registro.jugadores[clave]["parejas"]}
+            parejas = [pareja for pareja in modelo.parejas if pareja["id"] in ids]
+            if not parejas:
+                st.info("🔍 Ningún jugador coincide con la búsqueda")
+        for pareja in parejas:
             col1, col2 = st.columns([3, 1])
             with col1:
                 st.markdown(f"""
@@ -561,17 +560,38 @@ def show_parejas_management():
                 </div>""", unsafe_allow_html=True)
             with col2:
                 if st.button(f"🗑️", key=f"delete_{pareja['id']}", help="Eliminar pareja"):
-                    remove_pareja(pareja["id"])
-                    st.rerun()
+                    success, message = remove_pareja(pareja["id"])
+                    if success:
+                        st.rerun()
+                    else:
+                        st.error(f"❌ {message}")
     else:
         st.info("📝 No hay parejas registradas. ¡Añade la primera pareja para comenzar!")
 
 
+def show_estadisticas_jugadores(registro, claves):
+    estadisticas = [registro.estadisticas(clave) for clave in claves[:50]]
+    st.dataframe(pd.DataFrame({
+        "Jugador": [e["jugador"] for e in estadisticas],
+        "Compañeros": [", ".join(e["companeros"]) for e in estadisticas],
+        "V": [e["victorias"] for e in estadisticas],
+        "D": [e["derrotas"] for e in estadisticas],
+        "V histórico": [e["victorias_total"] for e in estadisticas],
+        "D histórico": [e["derrotas_total"] for e in estadisticas]
+    }), hide_index=True, use_container_width=True)
+    if len(claves) > 50:
+        st.caption(f"Mostrando 50 de {len(claves)} jugadores: afina la búsqueda")
+
+
 def show_partidos_management():
     st.header("🏆 Partidos")
-    torneo = initialize_tournament()
-    if len(torneo["parejas"]) >= 2:
-        if st.button("🎯 Generar Nueva Jornada", use_container_width=True):
+    modelo = get_tournament_model()
+    if len(modelo.parejas) >= 2:
+        formato = modelo.datos.get("formato") or {"tipo": "liga"}
+        etiqueta = {"suizo": "🎯 Generar Nueva Ronda Suiza",
+                    "grupos": "🎯 Generar Siguiente Ronda (Grupos / Cuadro)"}.get(formato["tipo"],
+                                                                               "🎯 Generar Nueva Jornada")
+        if st.button(etiqueta, use_container_width=True):
             success, message = generate_jornada()
             if success:
                 st.success(f"✅ {message}")
@@ -580,111 +600,223 @@ def show_partidos_management():
                 st.warning(f"⚠️ {message}")
     else:
         st.info("👥 Se necesitan al menos 2 parejas para generar partidos")
+    if modelo.partidos_pendientes:
+        show_programacion(modelo)
+        show_carga_resultados(modelo)
     st.markdown("---")
-    if torneo["partidos"]:
-        st.subheader(f"📋 Partidos ({len(torneo['partidos'])})")
-        filter_col1, filter_col2 = st.columns(2)
+    if modelo.partidos:
+        st.subheader(f"📋 Partidos ({len(modelo.partidos)})")
+        filter_col1, filter_col2, filter_col3 = st.columns(3)
         with filter_col1:
-            mostrar_completados = st.checkbox("✅ Mostrar completados", value=True)
+            estados = {"todos": "📋 Todos", "pendientes": "⏳ Pendientes", "completados": "✅ Completados"}
+            estado = st.selectbox("Estado", list(estados), format_func=estados.get, key="filtro_estado")
         with filter_col2:
-            mostrar_pendientes = st.checkbox("⏳ Mostrar pendientes", value=True)
-        partidos_filtrados = torneo["partidos"]
-        if not mostrar_completados:
-            partidos_filtrados = [p for p in partidos_filtrados if not p["ganador_id"]]
-        if not mostrar_pendientes:
-            partidos_filtrados = [p for p in partidos_filtrados if p["ganador_id"]]
-        for partido in partidos_filtrados:
-            pareja1 = next(p for p in torneo["parejas"] if p["id"] == partido["pareja1_id"])
-            pareja2 = next(p for p in torneo["parejas"] if p["id"] == partido["pareja2_id"])
-            st.markdown(f"""
-            <div class="partido-card">
-                <div class="partido-header">🏆 Partido #{partido["id"]}</div>
-            </div>""", unsafe_allow_html=True)
-            col1, col2, col3 = st.columns([2, 1, 2])
-            with col1:
-                st.markdown(f"**👥 {' & '.join(pareja1['jugadores'])}**")
-                st.caption(f"Victorias: {pareja1['victorias']}")
-            with col2:
-                st.markdown("<div style='text-align: center; font-size: 2rem;'>⚔️</div>", unsafe_allow_html=True)
-            with col3:
-                st.markdown(f"**👥 {' & '.join(pareja2['jugadores'])}**")
-                st.caption(f"Victorias: {pareja2['victorias']}")
-            ganador_actual = partido["ganador_id"]
-            opciones = [
-                (None, "Sin resultado"),
-                (pareja1["id"], f"🏆 {' & '.join(pareja1['jugadores'])}"),
-                (pareja2["id"], f"🏆 {' & '.join(pareja2['jugadores'])}")
-            ]
-            index_actual = 0
-            for i, (id_pareja, _) in enumerate(opciones):
-                if id_pareja == ganador_actual:
-                    index_actual = i
-                    break
-            ganador_seleccionado = st.radio(
-                "Seleccionar ganador:",
-                options=[opcion[1] for opcion in opciones],
-                index=index_actual,
-                key=f"ganador_{partido['id']}",
-                horizontal=True
-            )
-            ganador_id_seleccionado = None
-            for id_pareja, texto in opciones:
-                if texto == ganador_seleccionado:
-                    ganador_id_seleccionado = id_pareja
-                    break
-            if ganador_id_seleccionado != ganador_actual:
-                if st.button(f"💾 Guardar Resultado", key=f"save_{partido['id']}", use_container_width=True):
-                    update_resultado(partido["id"], ganador_id_seleccionado)
-                    st.success("✅ Resultado guardado")
-                    st.rerun()
-            st.markdown("---")
+            pareja_id = st.selectbox("👥 Pareja", [None] + [p["id"] for p in modelo.parejas],
+                                     format_func=lambda i: "Todas" if i is None else
+                                     " & ".join(modelo.pareja(i)["jugadores"]), key="filtro_pareja")
+        with filter_col3:
+            jugador = st.text_input("🔍 Jugador", placeholder="Nombre del jugador", key="filtro_jugador")
+        completados = {"todos": None, "pendientes": False, "completados": True}[estado]
+        if jugador.strip():
+            registro = modelo.jugadores
+            pareja_ids = {i for clave in registro.buscar(jugador) for i in registro.jugadores[clave]["parejas"]}
+            if pareja_id is not None:
+                pareja_ids &= {pareja_id}
+        else:
+            pareja_ids = None if pareja_id is None else {pareja_id}
+        partidos_filtrados = modelo.filtrar_partidos(completados, pareja_ids)
+        paginas = max(1, -(-len(partidos_filtrados) // PARTIDOS_POR_PAGINA))
+        if st.session_state.get("pagina_partidos", 1) > paginas:
+            st.session_state.pagina_partidos = 1
+        pagina = st.number_input(f"📄 Página (de {paginas})", min_value=1, max_value=paginas,
+                                 key="pagina_partidos")
+        inicio = (pagina - 1) * PARTIDOS_POR_PAGINA
+        st.caption(f"{len(partidos_filtrados)} partidos · mostrando "
+                   f"{min(inicio + 1, len(partidos_filtrados))}-"
+                   f"{min(inicio + PARTIDOS_POR_PAGINA, len(partidos_filtrados))}")
+        for partido in partidos_filtrados[inicio:inicio + PARTIDOS_POR_PAGINA]:
+            show_partido(partido["id"])
     else:
         st.info("🏆 No hay partidos generados. Genera una jornada para comenzar.")
 
 
+def _guardar_resultado(partido_id, ganador_id, ganador_visto):
+    success, message = update_resultado(partido_id, ganador_id, ganador_visto)
+    st.session_state[f"mensaje_{partido_id}"] = (success, message)
+
+
+# Cada partido es un fragmento: guardar un resultado solo vuelve a ejecutar su propia fila
+@st.fragment
+def show_partido(partido_id):
+    modelo = get_tournament_model()
+    partido = modelo.partido(partido_id)
+    if partido is None:
+        st.warning(f"⚠️ El partido #{partido_id} ya no existe")
+        return
+    pareja1 = modelo.pareja(partido["pareja1_id"])
+    pareja2 = modelo.pareja(partido["pareja2_id"])
+    if pareja1 is None or pareja2 is None:
+        st.warning(f"⚠️ El partido #{partido_id} es contra una pareja que ya no existe")
+        return
+    jornada = f" · Jornada {partido['jornada']}" if partido.get("jornada") else ""
+    if partido.get("grupo"):
+        jornada += f" · Grupo {partido['grupo']}"
+    elif partido.get("fase") == "eliminatoria":
+        jornada += f" · Cuadro ronda {partido['ronda_cuadro']}"
+    if partido.get("pista") and not partido["ganador_id"]:
+        jornada += f" · 🎾 Pista {partido['pista']} · 🕒 {partido['horario']}"
+    st.markdown(f"""
+    <div class="partido-card">
+        <div class="partido-header">🏆 Partido #{partido["id"]}{jornada}</div>
+    </div>""", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([2, 1, 2])
+    with col1:
+        st.markdown(f"**👥 {' & '.join(pareja1['jugadores'])}**")
+        st.caption(f"Victorias: {pareja1['victorias']}")
+    with col2:
+        st.markdown("<div style='text-align: center; font-size: 2rem;'>⚔️</div>", unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"**👥 {' & '.join(pareja2['jugadores'])}**")
+        st.caption(f"Victorias: {pareja2['victorias']}")
+    ganador_actual = partido["ganador_id"]
+    opciones = [
+        (None, "Sin resultado"),
+        (pareja1["id"], f"🏆 {' & '.join(pareja1['jugadores'])}"),
+        (pareja2["id"], f"🏆 {' & '.join(pareja2['jugadores'])}")
+    ]
+    index_actual = 0
+    for i, (id_pareja, _) in enumerate(opciones):
+        if id_pareja == ganador_actual:
+            index_actual = i
+            break
+    ganador_seleccionado = st.radio(
+        "Seleccionar ganador:",
+        options=[opcion[1] for opcion in opciones],
+        index=index_actual,
+        key=f"ganador_{partido['id']}",
+        horizontal=True
+    )
+    ganador_id_seleccionado = None
+    for id_pareja, texto in opciones:
+        if texto == ganador_seleccionado:
+            ganador_id_seleccionado = id_pareja
+            break
+    mensaje = st.session_state.pop(f"mensaje_{partido['id']}", None)
+    if mensaje:
+        success, message = mensaje
+        if success:
+            st.success(f"✅ {message}")
+        else:
+            st.error(f"❌ {message}")
+    if ganador_id_seleccionado != ganador_actual:
+        st.button(f"💾 Guardar Resultado", key=f"save_{partido['id']}", use_container_width=True,
+                  on_click=_guardar_resultado, args=(partido["id"], ganador_id_seleccionado, ganador_actual))
+    st.markdown("---")
+
+
+def show_carga_resultados(modelo):
+    with st.expander("📝 Carga Rápida de Resultados"):
+        jornadas = sorted({p.get("jornada") or 0 for p in modelo.partidos_pendientes})
+        jornada = st.selectbox("📅 Jornada", jornadas, index=len(jornadas) - 1,
+                               format_func=lambda j: f"Jornada {j}" if j else "Sin jornada",
+                               key="carga_jornada")
+        pendientes = [p for p in modelo.partidos_pendientes if (p.get("jornada") or 0) == jornada
+                      and p["pareja1_id"] in modelo.pareja_por_id and p["pareja2_id"] in modelo.pareja_por_id]
+        # Como en la lista de partidos: solo se dibujan los radios de una página
+        paginas = max(1, -(-len(pendientes) // PARTIDOS_POR_PAGINA))
+        if st.session_state.get("pagina_carga", 1) > paginas:
+            st.session_state.pagina_carga = 1
+        pagina = st.number_input(f"📄 Página (de {paginas})", min_value=1, max_value=paginas, key="pagina_carga")
+        inicio = (pagina - 1) * PARTIDOS_POR_PAGINA
+        with st.form("carga_resultados_form"):
+            selecciones = {}
+            for partido in pendientes[inicio:inicio + PARTIDOS_POR_PAGINA]:
+                opciones = [None, partido["pareja1_id"], partido["pareja2_id"]]
+                selecciones[partido["id"]] = st.radio(
+                    f"Partido #{partido['id']}", opciones, horizontal=True, key=f"lote_{partido['id']}",
+                    format_func=lambda i: "Sin resultado" if i is None else
+                    f"🏆 {' & '.join(modelo.pareja(i)['jugadores'])}")
+            if st.form_submit_button("💾 Guardar Todos los Resultados", use_container_width=True):
+                resultados = [(partido_id, ganador_id) for partido_id, ganador_id in selecciones.items()
+                              if ganador_id is not None]
+                if not resultados:
+                    st.warning("⚠️ No se ha marcado ningún ganador")
+                else:
+                    success, message = update_resultados(resultados, {partido_id: None for partido_id, _ in resultados})
+                    if success:
+                        st.success(f"✅ {message}")
+                        st.rerun()
+                    else:
+                        st.error(f"❌ {message}")
+
+
+def _guardar_no_disponible(pareja_id):
+    seleccion = st.session_state[f"no_disponible_{pareja_id}"]
+    if seleccion:
+        st.session_state.no_disponible[pareja_id] = seleccion
+    else:
+        st.session_state.no_disponible.pop(pareja_id, None)
+
+
+def show_programacion(modelo):
+    with st.expander("🗓️ Programar Pistas y Horarios"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            num_pistas = st.number_input("🎾 Pistas", min_value=1, max_value=50, value=4)
+        with col2:
+            inicio = st.time_input("🕒 Primer partido", value=datetime.strptime("09:00", "%H:%M").time())
+        with col3:
+            duracion = st.number_input("⏱️ Minutos por partido", min_value=10, max_value=240, value=60, step=5)
+        with col4:
+            num_horarios = st.number_input("🔢 Turnos", min_value=1, max_value=96, value=10)
+        inicio_minutos = inicio.hour * 60 + inicio.minute
+        horarios = [f"{(inicio_minutos + i * duracion) // 60 % 24:02d}:{(inicio_minutos + i * duracion) % 60:02d}"
+                    for i in range(int(num_horarios))]
+        # Un único selector de pareja: las restricciones se guardan en la sesión en vez de un widget por pareja
+        no_disponible = st.session_state.setdefault("no_disponible", {})
+        con_partidos = [p["id"] for p in modelo.parejas if modelo.partidos_de(p["id"])]
+        pareja_id = st.selectbox("👥 Pareja con turnos en los que no puede jugar", con_partidos,
+                                 format_func=lambda i: " & ".join(modelo.pareja(i)["jugadores"]),
+                                 key="no_disponible_pareja")
+        if pareja_id is not None:
+            clave = f"no_disponible_{pareja_id}"
+            st.session_state[clave] = [h for h in no_disponible.get(pareja_id, []) if h in horarios]
+            st.multiselect("🚫 Turnos no disponibles", horarios, key=clave,
+                           on_change=_guardar_no_disponible, args=(pareja_id,))
+        restringidas = [i for i in con_partidos if no_disponible.get(i)]
+        if restringidas:
+            st.caption("Restricciones: " + " · ".join(
+                f"{' & '.join(modelo.pareja(i)['jugadores'])} ({', '.join(no_disponible[i])})" for i in restringidas))
+        if st.button("🗓️ Programar Partidos Pendientes", use_container_width=True):
+            success, message = schedule_partidos(int(num_pistas), horarios,
+                                                 {i: no_disponible[i] for i in restringidas})
+            if success:
+                st.success(f"✅ {message}")
+                st.rerun()
+            else:
+                st.warning(f"⚠️ {message}")
+
+
 def show_clasificacion():
     st.header("📈 Clasificación")
-    clasificacion = get_clasificacion()
-    if clasificacion:
-        data = []
-        for i, pareja in enumerate(clasificacion):
-            posicion = i + 1
-            nombre_pareja = " & ".join(pareja["jugadores"])
-            victorias = pareja["victorias"]
-            derrotas = pareja["derrotas"]
-            partidos_jugados = victorias + derrotas
-            porcentaje_victoria = (victorias / partidos_jugados * 100) if partidos_jugados > 0 else 0
-            data.append({
-                "Pos": posicion,
-                "Pareja": nombre_pareja,
-                "PJ": partidos_jugados,
-                "V": victorias,
-                "D": derrotas,
-                "% Victoria": f"{porcentaje_victoria:.1f}%"
-            })
-        df = pd.DataFrame(data)
+    show_clasificacion_en_directo()
+    show_clasificacion_historica()
+
+
+@st.fragment(run_every=REFRESCO_SEGUNDOS)
+def show_clasificacion_en_directo():
+    live_version("clasificacion")
+    modelo = get_tournament_model()
+    resumen = get_tournament_summary()
+    if modelo.parejas:
+        table_html = get_render_memo().get("clasificacion", modelo.version, lambda: render_clasificacion(modelo))
+        total_partidos = resumen.completados
+        partidos_posibles = resumen.parejas * (resumen.parejas - 1) // 2
+        progreso = (total_partidos / partidos_posibles * 100) if partidos_posibles > 0 else 0
         st.markdown("### 🏆 Tabla de Clasificación")
-        table_html = '<table class="clasificacion-table"><thead><tr>'
-        for col in df.columns:
-            table_html += f'<th>{col}</th>'
-        table_html += '</tr></thead><tbody>'
-        for _, row in df.iterrows():
-            table_html += '<tr>'
-            for col in df.columns:
-                if col == "Pos" and row[col] <= 3:
-                    medals = {1: "🥇", 2: "🥈", 3: "🥉"}
-                    table_html += f'<td>{medals.get(row[col], "")} {row[col]}</td>'
-                else:
-                    table_html += f'<td>{row[col]}</td>'
-            table_html += '</tr>'
-        table_html += '</tbody></table>'
         st.markdown(table_html, unsafe_allow_html=True)
         st.markdown("---")
         st.subheader("📊 Estadísticas del Torneo")
-        total_partidos = sum(p["victorias"] + p["derrotas"] for p in clasificacion) // 2
-        total_parejas = len(clasificacion)
-        partidos_posibles = total_parejas * (total_parejas - 1) // 2 if total_parejas > 1 else 0
-        progreso = (total_partidos / partidos_posibles * 100) if partidos_posibles > 0 else 0
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("🎯 Partidos Jugados", total_partidos)
@@ -695,6 +827,143 @@ def show_clasificacion():
         st.progress(progreso / 100)
     else:
         st.info("📊 No hay datos de clasificación. Registra parejas y juega algunos partidos para ver la clasificación.")
+    show_grupos_y_cuadro(modelo)
+
+
+# Fuera del fragmento en directo: mover el selector no debe competir con el refresco automático
+def show_clasificacion_historica():
+    modelo = get_tournament_model()
+    if not modelo.partidos_completados:
+        return
+    with st.expander("🕰️ Clasificación histórica"):
+        clave = st.radio("📅 Ver la clasificación", ["jornada", "fecha"], horizontal=True,
+                         format_func={"jornada": "Tras la jornada", "fecha": "A fecha de"}.get,
+                         key="historico_clave")
+        historial = modelo.historial(clave)
+        puntos = historial.puntos()
+        if not puntos:
+            st.info("No hay partidos jugados con jornada o fecha")
+            return
+        if len(puntos) > 1:
+            valor = st.select_slider("Jornada" if clave == "jornada" else "Fecha", options=puntos,
+                                     value=puntos[-1], key=f"historico_{clave}")
+        else:
+            valor = puntos[0]
+        filas = get_clasificacion_historica(valor, clave)
+        df = pd.DataFrame({
+            "Pos": range(1, len(filas) + 1),
+            "Pareja": [" & ".join(pareja["jugadores"]) for pareja in filas],
+            "V": [pareja["victorias"] for pareja in filas],
+            "D": [pareja["derrotas"] for pareja in filas]
+        })
+        st.dataframe(df, hide_index=True, use_container_width=True)
+
+        st.markdown("**📉 Evolución de la posición**")
+        nombres = {pareja["id"]: " & ".join(pareja["jugadores"]) for pareja in filas}
+        seleccion = st.multiselect("Parejas", list(nombres), default=[pareja["id"] for pareja in filas[:5]],
+                                   format_func=nombres.get, key="historico_parejas")
+        if seleccion:
+            posiciones = historial.positions(puntos, seleccion)
+            evolucion = pd.DataFrame([
+                {"Punto": str(punto), "Pareja": nombres[pareja_id], "Posición": serie[i]}
+                for pareja_id, serie in posiciones.items() for i, punto in enumerate(puntos)])
+            grafico = alt.Chart(evolucion).mark_line(point=True).encode(
+                x=alt.X("Punto:O", title="Jornada" if clave == "jornada" else "Fecha", sort=None),
+                y=alt.Y("Posición:Q", scale=alt.Scale(reverse=True, domainMin=1)),
+                color="Pareja:N")
+            st.altair_chart(grafico, use_container_width=True)
+
+
+def show_grupos_y_cuadro(modelo):
+    formato = modelo.datos.get("formato") or {}
+    if formato.get("tipo") != "grupos" or "grupos" not in formato:
+        return
+    st.markdown("---")
+    st.subheader("🗂️ Fase de Grupos")
+    grupos = modelo.clasificacion_grupos()
+    columnas = st.columns(min(len(grupos), 4))
+    for i, (nombre, filas) in enumerate(grupos):
+        with columnas[i % len(columnas)]:
+            st.markdown(f"**Grupo {nombre}**")
+            for posicion, fila in enumerate(filas, 1):
+                marca = "⬆️" if posicion <= formato["clasifican"] else "▫️"
+                st.write(f"{marca} {posicion}. {' & '.join(fila['jugadores'])} "
+                         f"({fila['victorias']}V - {fila['derrotas']}D)")
+    cuadro = formato.get("cuadro")
+    if not cuadro:
+        return
+    st.subheader("🏆 Cuadro Eliminatorio")
+
+    def nombre(pareja_id):
+        pareja = modelo.pareja(pareja_id)
+        return " & ".join(pareja["jugadores"]) if pareja else "—"
+
+    for numero, ronda in enumerate(cuadro["rondas"]):
+        ids = cuadro["partidos"][numero] if numero < len(cuadro["partidos"]) else []
+        st.markdown(f"**Ronda {numero + 1}**")
+        for i in range(0, len(ronda), 2):
+            partido = modelo.partido(ids[i // 2]) if i // 2 < len(ids) and ids[i // 2] else None
+            if ronda[i] is None or ronda[i + 1] is None:
+                st.write(f"➡️ {nombre(ronda[i] if ronda[i] is not None else ronda[i + 1])} (pasa sin jugar)")
+            elif partido and partido["ganador_id"]:
+                st.write(f"✅ {nombre(ronda[i])} vs {nombre(ronda[i + 1])} → 🏆 {nombre(partido['ganador_id'])}")
+            else:
+                st.write(f"⏳ {nombre(ronda[i])} vs {nombre(ronda[i + 1])}")
+
+
+def show_formato():
+    formato = get_formato()
+    tipos = {"liga": "🔁 Liga (todos contra todos)", "suizo": "🇨🇭 Sistema suizo",
+             "grupos": "🗂️ Fase de grupos + cuadro eliminatorio"}
+    with st.form("formato_form"):
+        tipo = st.selectbox("🏁 Formato del torneo", list(tipos), format_func=tipos.get,
+                            index=list(tipos).index(formato["tipo"]))
+        rondas = st.number_input("🔢 Rondas (sistema suizo)", min_value=1, max_value=30,
+                                 value=formato.get("rondas", 5))
+        col1, col2 = st.columns(2)
+        with col1:
+            num_grupos = st.number_input("🗂️ Número de grupos", min_value=1, max_value=64,
+                                         value=formato.get("num_grupos", 4))
+        with col2:
+            clasifican = st.number_input("⬆️ Clasifican por grupo", min_value=1, max_value=8,
+                                         value=formato.get("clasifican", 2))
+        sembrado = st.checkbox("🌱 Sembrar los grupos según la clasificación actual",
+                               value=formato.get("sembrado", True))
+        if st.form_submit_button("💾 Guardar Formato", use_container_width=True):
+            nuevo = {"tipo": tipo}
+            if tipo == "suizo":
+                # Se conservan las rondas ya jugadas y los descansos si el torneo ya era suizo
+                nuevo = dict(formato if formato["tipo"] == "suizo" else {}, tipo=tipo, rondas=int(rondas))
+            elif tipo == "grupos" and num_grupos * clasifican < 2:
+                st.error("❌ El cuadro eliminatorio necesita al menos 2 parejas clasificadas")
+                return
+            elif tipo == "grupos":
+                # Los grupos ya sorteados no se rehacen: solo se aplican los ajustes si aún no hay grupos
+                nuevo = formato if formato["tipo"] == "grupos" and "grupos" in formato else {
+                    "tipo": tipo, "num_grupos": int(num_grupos), "clasifican": int(clasifican),
+                    "sembrado": sembrado}
+            success, message = set_formato(nuevo)
+            if success:
+                st.success(f"✅ {message}")
+                st.rerun()
+            else:
+                st.error(f"❌ {message}")
+
+
+def show_importacion():
+    with st.expander("📥 Importación Masiva (CSV / JSONL)"):
+        st.caption("Parejas: columnas jugador1, jugador2. Resultados: pareja1, pareja2 (nombre de un jugador de "
+                   "cada pareja), ganador (jugador de la pareja ganadora, vacío si está pendiente) y fecha opcional.")
+        archivo = st.file_uploader("📄 Fichero", type=["csv", "jsonl", "json"], key="import_file")
+        if archivo is not None and st.button("📥 Importar", use_container_width=True):
+            success, message, errores = import_tournament_file(archivo, archivo.name)
+            if success:
+                st.success(f"✅ {message}")
+            else:
+                st.error(f"❌ {message}")
+            if errores:
+                st.dataframe(pd.DataFrame(errores[:500], columns=["Línea", "Error"]), hide_index=True,
+                             use_container_width=True)
 
 
 def show_configuration():
@@ -715,7 +984,7 @@ def show_configuration():
                 if new_username and new_password:
                     if new_username not in users:
                         users[new_username] = hash_password(new_password)
-                        save_json(USUARIOS_FILE, users)
+                        persist_json(USUARIOS_FILE, users)
                         st.success(f"✅ Usuario '{new_username}' creado correctamente")
                         st.rerun()
                     else:
@@ -734,7 +1003,7 @@ def show_configuration():
             if username != "admin":
                 if st.button(f"🗑️", key=f"delete_user_{username}", help="Eliminar usuario"):
                     del users[username]
-                    save_json(USUARIOS_FILE, users)
+                    persist_json(USUARIOS_FILE, users)
                     st.success(f"✅ Usuario '{username}' eliminado")
                     st.rerun()
     st.markdown("---")
@@ -745,6 +1014,24 @@ def show_configuration():
         st.metric("👥 Total Parejas", len(torneo["parejas"]))
     with col2:
         st.metric("🏆 Total Partidos", len(torneo["partidos"]))
+    show_formato()
+    show_importacion()
+    discrepancias = check_contadores()
+    if discrepancias:
+        st.error(f"⚠️ {len(discrepancias)} parejas tienen victorias/derrotas que no cuadran con los partidos")
+        modelo = get_tournament_model()
+        for pareja_id, (victorias, derrotas), (victorias_ok, derrotas_ok) in discrepancias:
+            st.write(f"👥 {' & '.join(modelo.pareja(pareja_id)['jugadores'])}: "
+                     f"{victorias}V/{derrotas}D guardadas, {victorias_ok}V/{derrotas_ok}D según los partidos")
+        if st.button("🔧 Reparar Contadores", use_container_width=True):
+            success, message = repair_contadores()
+            if success:
+                st.success(f"✅ {message}")
+                st.rerun()
+            else:
+                st.error(f"❌ {message}")
+    else:
+        st.caption("✅ Victorias y derrotas cuadran con los partidos registrados")
     st.warning("⚠️ **Zona de Peligro**")
     if st.button("🔄 Reiniciar Torneo Completo", use_container_width=True, type="secondary"):
         if "confirm_reset" not in st.session_state:
@@ -755,10 +1042,13 @@ def show_configuration():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("✅ Sí, Reiniciar", use_container_width=True):
-                reset_tournament()
+                success, message = reset_tournament()
                 st.session_state.confirm_reset = False
-                st.success("✅ Torneo reiniciado correctamente")
-                st.rerun()
+                if success:
+                    st.success("✅ Torneo reiniciado correctamente")
+                    st.rerun()
+                else:
+                    st.error(f"❌ {message}")
         with col2:
             if st.button("❌ Cancelar", use_container_width=True):
                 st.session_state.confirm_reset = False
@@ -773,9 +1063,55 @@ def show_configuration():
     **📁 Archivos de Datos:**
     - Usuarios: `{USUARIOS_FILE}`
     - Torneo: `{TORNEO_FILE}`
+    - Diario: `{TORNEO_JOURNAL_FILE}`
+    - Base de datos: `{TORNEO_DB_FILE}`
+
+    **💾 Almacenamiento:** {STORAGE_MODE} · escritura {DURABILITY}
 
     """)
+    if DURABILITY == "deferred":
+        for estado in write_behind_stats():
+            st.caption(f"⏱️ `{estado['fichero']}`: {estado['escrituras']} escrituras, {estado['agrupadas']} cambios "
+                       f"agrupados, {estado['errores']} errores"
+                       f"{' · hay cambios pendientes de escribir' if estado['pendiente'] else ''}")
+        if st.button("💾 Escribir Cambios Pendientes", use_container_width=True):
+            if flush_writes():
+                st.success("✅ Cambios escritos en disco")
+            else:
+                st.error("❌ No se pudieron escribir todos los cambios")
+    if STORAGE_MODE == "journal":
+        registros = get_store().journal_records
+        st.caption(f"📝 Registros pendientes de compactar: {registros} (se compacta cada {JOURNAL_COMPACT_EVERY})")
+        if st.button("🗜️ Compactar Diario", use_container_width=True):
+            if compact_journal():
+                st.success("✅ Diario compactado")
+                st.rerun()
+    show_diagnostico()
+
+
+def show_diagnostico():
+    st.markdown("---")
+    st.subheader("🩺 Diagnóstico de Rendimiento")
+    estadisticas = get_run_stats()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("🔁 Reruns registrados", estadisticas.total)
+    with col2:
+        st.metric("🧑‍💻 Reruns de esta sesión", st.session_state.get("reruns", 0))
+    resumen = estadisticas.summary()
+    if not resumen:
+        st.info("Todavía no hay reruns medidos")
+        return
+    st.markdown("**Por página** (últimos reruns; E/S media por rerun)")
+    st.dataframe(pd.DataFrame(resumen).rename(columns={
+        "pagina": "Página", "reruns": "Reruns", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)",
+        "kb_leidos": "KB leídos", "kb_escritos": "KB escritos", "parseos_json": "Parseos JSON"}),
+        hide_index=True, use_container_width=True)
+    st.markdown("**Temporizadores**")
+    st.dataframe(pd.DataFrame(estadisticas.timers()).rename(columns={
+        "temporizador": "Temporizador", "ejecuciones": "Reruns", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)"}),
+        hide_index=True, use_container_width=True)
 
 
 if __name__ == "__main__":
-    main()
+    run_app()